@@ -0,0 +1,68 @@
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Keywords matched case-insensitively anywhere in the message. The first
+# theme with any matching keyword wins, and likewise the first intent.
+DEFAULT_KEYWORDS = {
+    "themes": {
+        "creative": ["creative", "fun", "colorful", "vibrant", "modern"],
+        "minimal": ["minimal", "simple", "clean", "basic"],
+    },
+    "intents": {
+        "help": ["help", "how", "what", "hello", "hi"],
+    },
+}
+
+DEFAULT_THEME = "professional"
+DEFAULT_INTENT = "chat"
+
+# Messages need a '#' and more than this many characters to become slides
+MIN_SLIDE_CONTENT_CHARS = 50
+
+KeywordTable = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+def _compile(group: Dict[str, List[str]]) -> KeywordTable:
+    return tuple((category, tuple(word.lower() for word in words if word)) for category, words in group.items())
+
+def _first_match(table: KeywordTable, lowered: str, default: str) -> str:
+    for category, words in table:
+        for word in words:
+            if word in lowered:
+                return category
+    return default
+
+class MessageClassifier:
+    """Classify a chat message for the rule-based path, built once from a keyword table.
+
+    The message is lowercased once and each keyword is a substring search
+    that stops at the first category with a hit. The intent is only looked
+    for in messages that will not become slides, the one place it is used.
+    """
+
+    def __init__(self, keywords: dict):
+        self.themes = _compile(keywords.get("themes", {}))
+        self.intents = _compile(keywords.get("intents", {}))
+
+    def classify(self, text: str) -> dict:
+        lowered = text.lower()
+        has_headers = "#" in text
+        has_markdown = has_headers and len(text.strip()) > MIN_SLIDE_CONTENT_CHARS
+        return {
+            "has_headers": has_headers,
+            "has_markdown": has_markdown,
+            # The fallback reply reports every '#' as a section
+            "slide_estimate": text.count("#") if has_markdown else 0,
+            "suggested_theme": _first_match(self.themes, lowered, DEFAULT_THEME),
+            "intent": None if has_markdown else _first_match(self.intents, lowered, DEFAULT_INTENT)
+        }
+
+def load_keywords(path: Optional[str]) -> dict:
+    """Read a keyword table from JSON, falling back to the built-in table"""
+    if not path:
+        return DEFAULT_KEYWORDS
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+# Point CLASSIFIER_KEYWORDS_FILE at a JSON file shaped like DEFAULT_KEYWORDS to change the table
+classifier = MessageClassifier(load_keywords(os.getenv("CLASSIFIER_KEYWORDS_FILE")))
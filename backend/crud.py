@@ -1,20 +1,44 @@
-from sqlalchemy.orm import Session
-from database import Conversation, Message
-from datetime import datetime
+from sqlalchemy import and_, bindparam, func, or_, text, update, LargeBinary
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload, undefer
+from database import CompressedText, Conversation, Deck, LLMResponse, Message
+from datetime import datetime, timedelta
 from typing import List, Optional
-
-def create_conversation(db: Session, conversation_id: str) -> Conversation:
-    """Create a new conversation"""
-    db_conversation = Conversation(id=conversation_id)
-    db.add(db_conversation)
-    db.commit()
-    db.refresh(db_conversation)
-    return db_conversation
+import hashlib
 
 def get_conversation(db: Session, conversation_id: str) -> Optional[Conversation]:
     """Get conversation by ID"""
     return db.query(Conversation).filter(Conversation.id == conversation_id).first()
 
+def get_or_create_deck(db: Session, html: str) -> Deck:
+    """Get the stored deck with this HTML, adding it if it is new"""
+    deck_id = hashlib.sha256(html.encode("utf-8")).hexdigest()
+    deck = db.get(Deck, deck_id)
+    if deck is not None:
+        return deck
+    
+    deck = Deck(id=deck_id, html=html, size_bytes=len(html.encode("utf-8")))
+    try:
+        # Another worker may store the same deck concurrently
+        with db.begin_nested():
+            db.add(deck)
+    except IntegrityError:
+        deck = db.get(Deck, deck_id)
+    return deck
+
+def save_deck(db: Session, html: str) -> str:
+    """Store a deck if it is new and return its ID"""
+    deck_id = get_or_create_deck(db, html).id
+    db.commit()
+    return deck_id
+
+def get_deck_html(db: Session, deck_id: str) -> Optional[str]:
+    """Get a stored deck's HTML"""
+    row = db.query(Deck.html).filter(Deck.id == deck_id).first()
+    return row[0] if row else None
+
 def create_message(
     db: Session,
     conversation_id: str,
@@ -22,30 +46,346 @@ def create_message(
     content: str,
     slides_html: Optional[str] = None,
     theme_suggestion: Optional[str] = None,
-    slides_generated: bool = False
+    slides_generated: bool = False,
+    commentary_for_id: Optional[int] = None
 ) -> Message:
     """Create a new message"""
+    record_conversation_activity(
+        db, conversation_id, datetime.utcnow(),
+        messages_added=1,
+        decks_added=1 if slides_html is not None else 0,
+        last_message=content
+    )
+    deck = get_or_create_deck(db, slides_html) if slides_html is not None else None
     db_message = Message(
         conversation_id=conversation_id,
         role=role,
         content=content,
-        slides_html=slides_html,
+        deck=deck,
         theme_suggestion=theme_suggestion,
-        slides_generated=slides_generated
+        slides_generated=slides_generated,
+        commentary_for_id=commentary_for_id
     )
     db.add(db_message)
     db.commit()
     db.refresh(db_message)
     return db_message
 
-def get_conversation_messages(db: Session, conversation_id: str) -> List[Message]:
-    """Get all messages for a conversation"""
-    return db.query(Message).filter(
+# Characters of the last message kept on the conversation for listings
+PREVIEW_LENGTH = 120
+
+def record_conversation_activity(
+    db: Session,
+    conversation_id: str,
+    now: datetime,
+    messages_added: int,
+    decks_added: int,
+    last_message: str
+) -> None:
+    """Create the conversation or update its summary and updated_at, without committing"""
+    preview = last_message[:PREVIEW_LENGTH]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        db.execute(
+            insert(Conversation)
+            .values(
+                id=conversation_id,
+                created_at=now,
+                updated_at=now,
+                message_count=messages_added,
+                deck_count=decks_added,
+                last_message_preview=preview
+            )
+            .on_conflict_do_update(index_elements=[Conversation.id], set_={
+                "updated_at": now,
+                "message_count": Conversation.message_count + messages_added,
+                "deck_count": Conversation.deck_count + decks_added,
+                "last_message_preview": preview
+            })
+        )
+        return
+    
+    conversation = db.get(Conversation, conversation_id)
+    if conversation is None:
+        conversation = Conversation(id=conversation_id, created_at=now, message_count=0, deck_count=0)
+        db.add(conversation)
+    conversation.updated_at = now
+    conversation.message_count += messages_added
+    conversation.deck_count += decks_added
+    conversation.last_message_preview = preview
+
+def create_chat_turn(
+    db: Session,
+    conversation_id: str,
+    user_content: str,
+    assistant_content: str,
+    slides_html: Optional[str] = None,
+    theme_suggestion: Optional[str] = None,
+    commentary_status: Optional[str] = None
+) -> int:
+    """Store a user message and the assistant reply in one transaction.
+
+    Creates the conversation if needed and updates its summary. Returns the
+    assistant message ID. Pass commentary_status='pending' when LLM
+    commentary on the reply will be stored later.
+    """
+    now = datetime.utcnow()
+    record_conversation_activity(
+        db, conversation_id, now,
+        messages_added=2,
+        decks_added=1 if slides_html is not None else 0,
+        last_message=assistant_content
+    )
+    
+    deck = get_or_create_deck(db, slides_html) if slides_html is not None else None
+    user_message = Message(
+        conversation_id=conversation_id,
+        role="user",
+        content=user_content
+    )
+    assistant_message = Message(
+        conversation_id=conversation_id,
+        role="assistant",
+        content=assistant_content,
+        deck=deck,
+        theme_suggestion=theme_suggestion,
+        slides_generated=slides_html is not None,
+        commentary_status=commentary_status
+    )
+    db.add_all([user_message, assistant_message])
+    db.flush()
+    # Read the ID before commit expires the instance
+    assistant_message_id = assistant_message.id
+    db.commit()
+    return assistant_message_id
+
+def get_cached_llm_response(db: Session, key: str, ttl_seconds: float) -> Optional[str]:
+    """Return a stored completion younger than the TTL; hits are recorded separately"""
+    row = db.query(LLMResponse.response).filter(
+        LLMResponse.key == key,
+        LLMResponse.created_at >= datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    ).first()
+    return row[0] if row else None
+
+def record_llm_cache_hits(db: Session, hits: dict) -> None:
+    """Add batched hit counts and last-use times, given as {key: (count, used_at)}, in one statement"""
+    table = LLMResponse.__table__
+    db.execute(
+        update(table)
+        .where(table.c.key == bindparam("entry_key"))
+        .values(hits=table.c.hits + bindparam("count"), last_used_at=bindparam("used_at")),
+        [{"entry_key": key, "count": count, "used_at": used_at} for key, (count, used_at) in hits.items()]
+    )
+    db.commit()
+
+def store_llm_response(
+    db: Session,
+    key: str,
+    model: str,
+    response: str,
+    ttl_seconds: float,
+    max_entries: int,
+    prune: bool = True
+) -> None:
+    """Store a completion, replacing any expired entry under the same key, then enforce the cache bounds if `prune`"""
+    now = datetime.utcnow()
+    values = {
+        "model": model,
+        "response": response,
+        "size_bytes": len(response.encode("utf-8")),
+        "hits": 0,
+        "created_at": now,
+        "last_used_at": now
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        db.execute(
+            insert(LLMResponse)
+            .values(key=key, **values)
+            .on_conflict_do_update(index_elements=[LLMResponse.key], set_=values)
+        )
+    else:
+        db.merge(LLMResponse(key=key, **values))
+    if prune:
+        prune_llm_cache(db, ttl_seconds, max_entries)
+    db.commit()
+
+def prune_llm_cache(db: Session, ttl_seconds: float, max_entries: int) -> int:
+    """Delete expired completions and the least recently used ones beyond max_entries, without committing"""
+    removed = db.query(LLMResponse).filter(
+        LLMResponse.created_at < datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    ).delete(synchronize_session=False)
+    
+    excess = db.query(LLMResponse).count() - max_entries
+    if excess > 0:
+        oldest = db.query(LLMResponse.key).order_by(LLMResponse.last_used_at).limit(excess)
+        removed += db.query(LLMResponse).filter(LLMResponse.key.in_(oldest.scalar_subquery())).delete(
+            synchronize_session=False
+        )
+    return removed
+
+def get_llm_cache_summary(db: Session) -> dict:
+    """Entry count, stored bytes and lifetime hits of the completion cache"""
+    entries, size_bytes, hits = db.query(
+        func.count(LLMResponse.key), func.sum(LLMResponse.size_bytes), func.sum(LLMResponse.hits)
+    ).one()
+    return {"entries": entries, "size_bytes": size_bytes or 0, "stored_hits": hits or 0}
+
+def get_conversation_messages(
+    db: Session,
+    conversation_id: str,
+    after: Optional[int] = None,
+    limit: int = 50
+) -> List[Message]:
+    """Get a page of a conversation's messages in order, without their decks.
+
+    `after` is the ID of the last message of the previous page; an ID that is
+    not in this conversation yields an empty page.
+    """
+    query = db.query(Message).options(undefer(Message.content)).filter(
         Message.conversation_id == conversation_id
-    ).order_by(Message.timestamp).all()
+    )
+    if after is not None:
+        anchor = db.query(Message.timestamp).filter(
+            Message.conversation_id == conversation_id,
+            Message.id == after
+        ).scalar()
+        if anchor is None:
+            return []
+        query = query.filter(or_(
+            Message.timestamp > anchor,
+            and_(Message.timestamp == anchor, Message.id > after)
+        ))
+    return query.order_by(Message.timestamp, Message.id).limit(limit).all()
+
+def get_message_slides(db: Session, conversation_id: str, message_id: int) -> Optional[Message]:
+    """Get one message with its deck HTML loaded"""
+    return db.query(Message).options(
+        selectinload(Message.deck).undefer(Deck.html),
+        undefer(Message.legacy_slides_html)
+    ).filter(
+        Message.conversation_id == conversation_id,
+        Message.id == message_id
+    ).first()
+
+def set_commentary_status(db: Session, message_id: int, status: str) -> None:
+    """Record the state of the deferred commentary awaited by a message"""
+    db.query(Message).filter(Message.id == message_id).update(
+        {"commentary_status": status}, synchronize_session=False
+    )
+    db.commit()
 
-def get_recent_conversations(db: Session, limit: int = 10) -> List[Conversation]:
-    """Get recent conversations"""
-    return db.query(Conversation).order_by(
-        Conversation.updated_at.desc()
+def store_commentary(db: Session, conversation_id: str, message_id: int, content: str) -> int:
+    """Store deferred LLM commentary as a reply to `message_id` and mark it ready.
+
+    Returns the commentary message ID.
+    """
+    db.query(Message).filter(Message.id == message_id).update(
+        {"commentary_status": "ready"}, synchronize_session=False
+    )
+    # create_message commits the status change along with the new message
+    return create_message(db, conversation_id, "assistant", content, commentary_for_id=message_id).id
+
+def get_commentary(db: Session, conversation_id: str, message_id: int):
+    """Get (commentary_status, commentary message) for a message, or None if the message does not exist"""
+    status = db.query(Message.commentary_status).filter(
+        Message.conversation_id == conversation_id,
+        Message.id == message_id
+    ).first()
+    if status is None:
+        return None
+    commentary = db.query(Message).options(undefer(Message.content)).filter(
+        Message.commentary_for_id == message_id
+    ).order_by(Message.id.desc()).first()
+    return status[0], commentary
+
+def get_recent_conversations(
+    db: Session,
+    limit: int = 10,
+    before: Optional[tuple] = None
+) -> List[Conversation]:
+    """Get recently updated conversations, newest first.
+
+    `before` is the (updated_at, id) of the last conversation of the previous page.
+    """
+    query = db.query(Conversation)
+    if before is not None:
+        updated_at, conversation_id = before
+        query = query.filter(or_(
+            Conversation.updated_at < updated_at,
+            and_(Conversation.updated_at == updated_at, Conversation.id < conversation_id)
+        ))
+    return query.order_by(
+        Conversation.updated_at.desc(),
+        Conversation.id.desc()
     ).limit(limit).all()
+
+def backfill_conversation_summaries(db: Session) -> int:
+    """Recompute every conversation's summary from its messages"""
+    conversations = db.query(Conversation).all()
+    for conversation in conversations:
+        messages = db.query(Message).filter(Message.conversation_id == conversation.id)
+        conversation.message_count = messages.count()
+        conversation.deck_count = messages.filter(or_(
+            Message.deck_id.isnot(None),
+            Message.legacy_slides_html.isnot(None)
+        )).count()
+        last = messages.options(undefer(Message.content)).order_by(
+            Message.timestamp.desc(), Message.id.desc()
+        ).first()
+        if last is not None:
+            conversation.last_message_preview = (last.content or "")[:PREVIEW_LENGTH]
+            conversation.updated_at = max(conversation.updated_at or last.timestamp, last.timestamp)
+    db.commit()
+    return len(conversations)
+
+def migrate_slides_html_to_decks(db: Session, batch_size: int = 200) -> int:
+    """Move inline slides_html of older messages into the decks table"""
+    migrated = 0
+    while True:
+        messages = db.query(Message).options(undefer(Message.legacy_slides_html)).filter(
+            Message.legacy_slides_html.isnot(None)
+        ).order_by(Message.id).limit(batch_size).all()
+        if not messages:
+            return migrated
+        for message in messages:
+            message.deck = get_or_create_deck(db, message.legacy_slides_html)
+            message.legacy_slides_html = None
+        db.commit()
+        migrated += len(messages)
+
+def backfill_compressed_column(db: Session, table: str, column: str, batch_size: int = 500) -> dict:
+    """Compress values of a CompressedText column that were stored as plain text"""
+    update = text(f"UPDATE {table} SET {column} = :value WHERE id = :id").bindparams(
+        bindparam("value", type_=LargeBinary)
+    )
+    rows = raw_bytes = stored_bytes = 0
+    last_id = None
+    while True:
+        # Keyset pagination on the primary key; works for integer and hash ids
+        where = "WHERE id > :last_id" if last_id is not None else ""
+        batch = db.execute(
+            text(f"SELECT id, {column} FROM {table} {where} ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": batch_size}
+        ).all()
+        if not batch:
+            break
+        for row_id, value in batch:
+            if value is None or CompressedText.is_compressed(value):
+                continue
+            decoded = CompressedText.decompress(value)
+            compressed = CompressedText.compress(decoded)
+            db.execute(update, {"value": compressed, "id": row_id})
+            rows += 1
+            raw_bytes += len(decoded.encode("utf-8"))
+            stored_bytes += len(compressed)
+        db.commit()
+        last_id = batch[-1][0]
+    return {
+        "rows": rows,
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored_bytes,
+        "ratio": raw_bytes / stored_bytes if stored_bytes else 1.0
+    }
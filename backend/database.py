@@ -1,17 +1,177 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, DateTime, Boolean, ForeignKey, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, relationship, deferred
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.types import TypeDecorator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import asyncio
+import functools
 import os
+import threading
+import time
+import zlib
 from dotenv import load_dotenv
+import metrics
 
 load_dotenv()
 
 # Database URL from environment variable
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./slides_app.db")
 
+class PoolStats:
+    """Connection pool counters, including time spent waiting for a connection"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+    
+    def record(self, counter: str):
+        """Count a pool event; pool hooks run on many threads at once"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checked_out": self.checkouts - self.checkins,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "max_wait_seconds": self.max_wait_seconds
+            }
+
+pool_stats = PoolStats()
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits"""
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record("timeouts")
+            raise
+        finally:
+            pool_stats.record_wait(time.perf_counter() - start)
+
+def _sqlite_profile() -> dict:
+    """File-backed SQLite: WAL so readers never block the writer, and a busy
+    timeout so concurrent writers wait instead of failing with "database is locked"."""
+    return {
+        "engine_kwargs": {
+            "connect_args": {"check_same_thread": False},
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": int(os.getenv("DB_POOL_SIZE", "8")),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "4")),
+            "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        },
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+            "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+            # Negative values are KiB rather than pages
+            "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024))),
+        },
+    }
+
+def _sqlite_memory_profile() -> dict:
+    """In-memory SQLite: one shared connection, so every DB thread sees the same database"""
+    return {"engine_kwargs": {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool}, "pragmas": {}}
+
+def _postgres_profile() -> dict:
+    """Postgres: a sized pool that drops stale connections before use"""
+    return {
+        "engine_kwargs": {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            "pool_pre_ping": True,
+        },
+        "pragmas": {},
+    }
+
+def _default_profile() -> dict:
+    """SQLAlchemy defaults, as before engine profiles existed"""
+    connect_args = {"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    return {"engine_kwargs": {"connect_args": connect_args}, "pragmas": {}}
+
+ENGINE_PROFILES = {
+    "sqlite": _sqlite_profile,
+    "sqlite-memory": _sqlite_memory_profile,
+    "postgres": _postgres_profile,
+    "default": _default_profile,
+}
+
+def _detect_engine_profile(url: str) -> str:
+    if url.startswith("sqlite"):
+        in_memory = url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+        return "sqlite-memory" if in_memory else "sqlite"
+    if url.startswith(("postgresql", "postgres")):
+        return "postgres"
+    return "default"
+
+# Engine tuning profile; "auto" picks one from DATABASE_URL
+DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE", "auto")
+if DB_ENGINE_PROFILE == "auto":
+    DB_ENGINE_PROFILE = _detect_engine_profile(DATABASE_URL)
+if DB_ENGINE_PROFILE not in ENGINE_PROFILES:
+    raise ValueError(
+        f"Unknown DB_ENGINE_PROFILE {DB_ENGINE_PROFILE!r}; expected one of: auto, {', '.join(ENGINE_PROFILES)}"
+    )
+_engine_profile = ENGINE_PROFILES[DB_ENGINE_PROFILE]()
+
 # Create engine
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
+engine = create_engine(DATABASE_URL, **_engine_profile["engine_kwargs"])
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    pool_stats.record("connects")
+    if _engine_profile["pragmas"]:
+        cursor = dbapi_connection.cursor()
+        for name, value in _engine_profile["pragmas"].items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_stats.record("checkouts")
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    pool_stats.record("checkins")
+
+def get_pool_status() -> dict:
+    """Describe the engine profile and connection pool usage"""
+    return {
+        "profile": DB_ENGINE_PROFILE,
+        "pool": engine.pool.status(),
+        **pool_stats.snapshot()
+    }
+
+metrics.CallbackMetric("slides_db_connections_checked_out", "Connections currently checked out of the pool",
+                       lambda: pool_stats.checkouts - pool_stats.checkins)
+metrics.CallbackMetric("slides_db_pool_wait_seconds_total", "Time spent waiting for a pooled connection",
+                       lambda: pool_stats.wait_seconds_total, kind="counter")
+metrics.CallbackMetric("slides_db_pool_timeouts_total", "Connection checkouts that timed out",
+                       lambda: pool_stats.timeouts, kind="counter")
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -19,34 +179,180 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Create Base class
 Base = declarative_base()
 
+class CompressedText(TypeDecorator):
+    """Text stored zlib-compressed in a binary column.
+
+    Stored values start with a marker byte: 0x01 for zlib data, 0x00 for raw
+    UTF-8 when compressing would not save space. Rows written before the
+    column was compressed are read back unchanged.
+    """
+    impl = LargeBinary
+    cache_ok = True
+    
+    RAW = b"\x00"
+    ZLIB = b"\x01"
+    
+    @classmethod
+    def compress(cls, value: str) -> bytes:
+        raw = value.encode("utf-8")
+        compressed = zlib.compress(raw, 6)
+        if len(compressed) < len(raw):
+            return cls.ZLIB + compressed
+        return cls.RAW + raw
+    
+    @classmethod
+    def decompress(cls, value) -> str:
+        if isinstance(value, str):
+            return value
+        value = bytes(value)
+        if value[:1] == cls.ZLIB:
+            return zlib.decompress(value[1:]).decode("utf-8")
+        if value[:1] == cls.RAW:
+            return value[1:].decode("utf-8")
+        return value.decode("utf-8")
+    
+    @classmethod
+    def is_compressed(cls, value) -> bool:
+        return isinstance(value, (bytes, memoryview)) and bytes(value[:1]) in (cls.RAW, cls.ZLIB)
+    
+    def process_bind_param(self, value, dialect):
+        return None if value is None else self.compress(value)
+    
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.decompress(value)
+
 # Database Models
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        # Serves the recent-conversations listing and its keyset pagination
+        Index("ix_conversations_updated_at_id", "updated_at", "id"),
+    )
     
     id = Column(String, primary_key=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Summary maintained on every write, so listings never scan messages
+    message_count = Column(Integer, nullable=False, default=0)
+    deck_count = Column(Integer, nullable=False, default=0)
+    last_message_preview = Column(String, nullable=True)
+
+class Deck(Base):
+    __tablename__ = "decks"
+    
+    id = Column(String, primary_key=True)  # SHA-256 of the HTML
+    html = deferred(Column(CompressedText))
+    size_bytes = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Serves history reads: one conversation's messages in order
+        Index("ix_messages_conversation_id_timestamp", "conversation_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    conversation_id = Column(String, index=True)
+    conversation_id = Column(String)
     role = Column(String)  # 'user' or 'assistant'
-    content = Column(Text)
-    slides_html = Column(Text, nullable=True)
+    content = deferred(Column(CompressedText))
+    # Decks are stored once in `decks`; the inline column only holds rows
+    # written before decks existed and not yet migrated
+    legacy_slides_html = deferred(Column("slides_html", CompressedText, nullable=True))
+    deck_id = Column(String, ForeignKey("decks.id"), nullable=True, index=True)
     theme_suggestion = Column(String, nullable=True)
     slides_generated = Column(Boolean, default=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
+    # Deferred LLM commentary: 'pending', 'ready' or 'failed' on the message
+    # that awaits it, and a link back to that message on the commentary itself
+    commentary_status = Column(String, nullable=True)
+    commentary_for_id = Column(Integer, ForeignKey("messages.id"), nullable=True, index=True)
+    
+    deck = relationship(Deck)
+    
+    @property
+    def slides_html(self):
+        if self.deck_id is not None:
+            return self.deck.html
+        return self.legacy_slides_html
+
+class LLMResponse(Base):
+    __tablename__ = "llm_responses"
+    
+    key = Column(String, primary_key=True)  # SHA-256 of the normalized prompt, model and params
+    model = Column(String)
+    response = deferred(Column(CompressedText))
+    size_bytes = Column(Integer)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+# Columns added after the first release, created on startup if missing
+_added_columns = {
+    "conversations": {
+        "message_count": "INTEGER NOT NULL DEFAULT 0",
+        "deck_count": "INTEGER NOT NULL DEFAULT 0",
+        "last_message_preview": "VARCHAR",
+    },
+    "messages": {
+        "deck_id": "VARCHAR REFERENCES decks (id)",
+        "commentary_status": "VARCHAR",
+        "commentary_for_id": "INTEGER REFERENCES messages (id)",
+    },
+}
+
+# Columns that became CompressedText after the first release, as (table, column)
+compressed_columns = [
+    ("messages", "content"),
+    ("messages", "slides_html"),
+    ("decks", "html"),
+]
+
+def upgrade_schema():
+    """Add columns that create_all cannot add to existing tables"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, columns in _added_columns.items():
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, ddl in columns.items():
+                if name not in existing:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+        
+        # SQLite stores bytes in TEXT columns as-is; Postgres needs bytea
+        if engine.dialect.name == "postgresql":
+            for table, name in compressed_columns:
+                column = next(c for c in inspector.get_columns(table) if c["name"] == name)
+                if not isinstance(column["type"], LargeBinary):
+                    connection.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {name} TYPE bytea USING convert_to({name}, 'UTF8')"
+                    ))
+    # create_all skips the indexes of tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 # Create tables
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
+
+# Threads that run blocking database work off the event loop
+DB_EXECUTOR_THREADS = int(os.getenv("DB_EXECUTOR_THREADS", "8"))
+_db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_THREADS, thread_name_prefix="db")
 
-# Dependency to get database session
-def get_db():
+def _call_with_session(fn, *args, **kwargs):
     db = SessionLocal()
     try:
-        yield db
+        with metrics.db_operation_seconds.time(operation=fn.__name__):
+            return fn(db, *args, **kwargs)
     finally:
         db.close()
+
+async def run_db(fn, *args, **kwargs):
+    """Run `fn(db, *args, **kwargs)` with its own session on the database thread pool.
+
+    The session is closed before returning, so any ORM objects in the result
+    must already have the attributes the caller reads loaded.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(_call_with_session, fn, *args, **kwargs))
@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+import json
+import os
+import struct
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder  # pyright: ignore[reportMissingImports]
+from fastapi.responses import Response  # pyright: ignore[reportMissingImports]
+
+# Bodies are compressed once and then reused, so spend the CPU on the best ratio
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "9"))
+# Smaller bodies are sent as-is; gzip framing would eat most of the saving
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+
+_DIGEST_LENGTH = 64
+# Packed entries: hex digest, identity body length, gzip bytes
+_LENGTH = struct.Struct(">Q")
+_HEADER_LENGTH = _DIGEST_LENGTH + _LENGTH.size
+
+class EncodedBody:
+    """A response body with its strong ETag and its gzip encoding, each built once.
+
+    Either form can be the source: bodies restored from a packed cache entry
+    only hold the gzip bytes and are decompressed if a client needs identity.
+    """
+    __slots__ = ("digest", "length", "_body", "_gzipped")
+
+    def __init__(
+        self,
+        body: Optional[bytes] = None,
+        gzipped: Optional[bytes] = None,
+        digest: Optional[str] = None,
+        length: Optional[int] = None
+    ):
+        self._body = body
+        self._gzipped = gzipped
+        self.digest = digest or hashlib.sha256(body).hexdigest()
+        # Identity size, kept with packed entries so hits make the same gzip decision
+        self.length = len(body) if body is not None else length
+
+    @classmethod
+    def from_content(cls, content) -> "EncodedBody":
+        """Serialize content the way FastAPI's JSONResponse would"""
+        return cls(json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":")
+        ).encode("utf-8"))
+
+    @classmethod
+    def unpack(cls, packed: bytes) -> "EncodedBody":
+        return cls(
+            gzipped=packed[_HEADER_LENGTH:],
+            digest=packed[:_DIGEST_LENGTH].decode("ascii"),
+            length=_LENGTH.unpack_from(packed, _DIGEST_LENGTH)[0]
+        )
+
+    def pack(self) -> bytes:
+        """Digest, identity length and gzip bytes, for storing in a render_cache store"""
+        return self.digest.encode("ascii") + _LENGTH.pack(self.length) + self.gzipped
+
+    @property
+    def body(self) -> bytes:
+        if self._body is None:
+            self._body = gzip.decompress(self._gzipped)
+        return self._body
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            # mtime=0 keeps the bytes, and so the gzip ETag, deterministic
+            self._gzipped = gzip.compress(self._body, compresslevel=GZIP_LEVEL, mtime=0)
+        return self._gzipped
+
+    @property
+    def worth_compressing(self) -> bool:
+        return self.length >= GZIP_MIN_BYTES
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        # Each content coding is its own representation, so it gets its own strong ETag
+        return f'"{self.digest[:32]}-gzip"' if encoding == "gzip" else f'"{self.digest[:32]}"'
+
+def accepts_gzip(request) -> bool:
+    """Check Accept-Encoding allows gzip (a q=0 entry refuses it)"""
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip().lower()
+            if not quality.startswith("q="):
+                return True
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return True
+    return False
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+def respond(request, encoded: EncodedBody, cache_control: str = "no-cache", media_type: str = "application/json") -> Response:
+    """Send `encoded` gzipped when the client allows it, or 304 when its cached copy is current.
+
+    Validators only apply to GET and HEAD. Responses to other methods, such as
+    POST /generate-slides, are compressed but carry no ETag and ignore
+    If-None-Match; the deck they describe is revalidated at its deck_url.
+    """
+    encoding = "gzip" if encoded.worth_compressing and accepts_gzip(request) else None
+    headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+    if request.method in ("GET", "HEAD"):
+        etag = encoded.etag(encoding)
+        headers["ETag"] = etag
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=encoded.gzipped, media_type=media_type, headers=headers)
+    return Response(content=encoded.body, media_type=media_type, headers=headers)
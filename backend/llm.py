@@ -0,0 +1,75 @@
+import asyncio
+import os
+from typing import Optional
+from dotenv import load_dotenv  # pyright: ignore[reportMissingImports]
+import openai  # pyright: ignore[reportMissingImports]
+
+load_dotenv()
+
+# LLM client configuration
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+
+# Caps the number of completions in flight on this worker
+_llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+_llm_client: Optional[openai.AsyncOpenAI] = None
+
+def get_llm_client() -> openai.AsyncOpenAI:
+    """Get the shared async OpenAI client, creating it on first use"""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = openai.AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=LLM_TIMEOUT_SECONDS
+        )
+    return _llm_client
+
+async def create_chat_completion(messages: list, timeout: Optional[float] = None, **params) -> str:
+    """Run a chat completion without blocking the event loop and return its text.
+
+    Waits for a concurrency slot, then raises asyncio.TimeoutError if the
+    completion takes longer than `timeout` seconds.
+    """
+    params.setdefault("model", LLM_MODEL)
+    async with _llm_semaphore:
+        response = await asyncio.wait_for(
+            get_llm_client().chat.completions.create(messages=messages, **params),
+            timeout=timeout or LLM_TIMEOUT_SECONDS
+        )
+    return response.choices[0].message.content
+
+async def stream_chat_completion(messages: list, timeout: Optional[float] = None, **params):
+    """Stream a chat completion, yielding text deltas as they arrive.
+
+    The concurrency slot is held until the stream is exhausted or closed.
+    `timeout` bounds the wait for the stream to open; the client timeout
+    bounds each read after that.
+    """
+    params.setdefault("model", LLM_MODEL)
+    async with _llm_semaphore:
+        stream = await asyncio.wait_for(
+            get_llm_client().chat.completions.create(messages=messages, stream=True, **params),
+            timeout=timeout or LLM_TIMEOUT_SECONDS
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+async def run_until_disconnected(request, coroutine, poll_interval: float = 0.5):
+    """Await `coroutine`, cancelling it if the HTTP client disconnects first.
+
+    Returns None when the client went away before the result was ready.
+    """
+    task = asyncio.ensure_future(coroutine)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                return None
+    finally:
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,146 @@
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import crud
+import llm
+import metrics
+from database import run_db
+
+# Completions cached in the llm_responses table
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+# Hit counts and last-use times are written back in batches at most this often
+LLM_CACHE_HIT_FLUSH_SECONDS = float(os.getenv("LLM_CACHE_HIT_FLUSH_SECONDS", "30"))
+# Expired and least recently used entries are pruned on every Nth store, so the
+# table may briefly hold up to LLM_CACHE_PRUNE_EVERY entries over the limit
+LLM_CACHE_PRUNE_EVERY = max(1, int(os.getenv("LLM_CACHE_PRUNE_EVERY", "100")))
+
+_TRAILING_SPACE = re.compile(r"[ \t]+$", re.MULTILINE)
+
+lookups = metrics.Counter("slides_llm_cache_lookups_total", "LLM cache lookups by result", ("result",))
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def record(self, result: str):
+        with self._lock:
+            setattr(self, result, getattr(self, result) + 1)
+        lookups.inc(result=result)
+
+    def snapshot(self) -> dict:
+        lookups_made = self.hits + self.misses
+        return {
+            "enabled": LLM_CACHE_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups_made if lookups_made else 0.0
+        }
+
+stats = CacheStats()
+
+class PendingHits:
+    """Cache hits not yet written to the llm_responses table"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits: Dict[str, Tuple[int, datetime]] = {}
+        self._last_flush = time.monotonic()
+
+    def add(self, key: str):
+        with self._lock:
+            count, _ = self._hits.get(key, (0, None))
+            self._hits[key] = (count + 1, datetime.utcnow())
+
+    def take(self, force: bool = False) -> Dict[str, Tuple[int, datetime]]:
+        """Hand over the pending hits once the flush interval has passed (or when forced)"""
+        with self._lock:
+            if not self._hits or (not force and time.monotonic() - self._last_flush < LLM_CACHE_HIT_FLUSH_SECONDS):
+                return {}
+            hits, self._hits = self._hits, {}
+            self._last_flush = time.monotonic()
+            return hits
+
+pending_hits = PendingHits()
+_stores = itertools.count(1)
+
+async def flush_hits(force: bool = False) -> None:
+    """Write the batched hits back; failures are logged and those hits dropped"""
+    hits = pending_hits.take(force)
+    if not hits:
+        return
+    try:
+        await run_db(crud.record_llm_cache_hits, hits)
+    except Exception as e:
+        print(f"LLM cache hit flush failed: {str(e)}")
+
+def normalize_prompt(content: str) -> str:
+    """Ignore line-ending and trailing-whitespace differences; keep everything else, since markdown is whitespace-sensitive"""
+    content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return _TRAILING_SPACE.sub("", content).strip()
+
+def make_key(messages: list, **params) -> str:
+    """Hash the normalized messages together with the model and sampling parameters"""
+    params.setdefault("model", llm.LLM_MODEL)
+    payload = {
+        "messages": [{"role": m["role"], "content": normalize_prompt(m["content"])} for m in messages],
+        "params": params
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+async def lookup(key: str, bypass: bool = False) -> Optional[str]:
+    """Return the cached completion for `key`, or None on a miss or bypass"""
+    if not LLM_CACHE_ENABLED:
+        return None
+    if bypass:
+        stats.record("bypassed")
+        return None
+    try:
+        response = await run_db(crud.get_cached_llm_response, key, LLM_CACHE_TTL_SECONDS)
+    except Exception as e:
+        print(f"LLM cache lookup failed: {str(e)}")
+        response = None
+    stats.record("hits" if response is not None else "misses")
+    if response is not None:
+        pending_hits.add(key)
+        await flush_hits()
+    return response
+
+async def store(key: str, response: str, model: Optional[str] = None) -> None:
+    """Cache a completion; failures are logged, never raised"""
+    if not LLM_CACHE_ENABLED or not response:
+        return
+    try:
+        await run_db(
+            crud.store_llm_response, key, model or llm.LLM_MODEL, response,
+            LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES, next(_stores) % LLM_CACHE_PRUNE_EVERY == 0
+        )
+    except Exception as e:
+        print(f"LLM cache store failed: {str(e)}")
+
+async def cached_chat_completion(messages: list, bypass: bool = False, latency_mode: str = "complete", **params) -> str:
+    """llm.create_chat_completion behind the persistent response cache.
+
+    Only real completions are timed, under llm_request_seconds{mode=latency_mode}.
+    """
+    key = make_key(messages, **params)
+    response = await lookup(key, bypass)
+    if response is not None:
+        return response
+
+    with metrics.llm_request_seconds.time(mode=latency_mode):
+        response = await llm.create_chat_completion(messages, **params)
+    await store(key, response, params.get("model"))
+    return response
@@ -1,18 +1,32 @@
-from fastapi import FastAPI, HTTPException, Depends  # pyright: ignore[reportMissingImports]
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request  # pyright: ignore[reportMissingImports]
 from fastapi.middleware.cors import CORSMiddleware  # pyright: ignore[reportMissingImports]
-from fastapi.responses import HTMLResponse, FileResponse  # pyright: ignore[reportMissingImports]
+from fastapi.responses import HTMLResponse, FileResponse, Response, StreamingResponse  # pyright: ignore[reportMissingImports]
 from fastapi.staticfiles import StaticFiles  # pyright: ignore[reportMissingImports]
 from pydantic import BaseModel  # pyright: ignore[reportMissingImports]
-from sqlalchemy.orm import Session  # pyright: ignore[reportMissingImports]
+import asyncio
+import hashlib
+import json
 import os
 from dotenv import load_dotenv  # pyright: ignore[reportMissingImports]
-import openai  # pyright: ignore[reportMissingImports]
 import markdown  # pyright: ignore[reportMissingModuleSource]
 import re
-from typing import Optional, List
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from typing import Iterator, Optional, List
 from datetime import datetime
-from database import get_db, create_tables
+from database import create_tables, get_pool_status, run_db
 import crud
+import http_cache
+from classifier import classifier
+import llm
+import llm_cache
+import metrics
+import profiling
+import render_cache
+from singleflight import SingleFlight
 
 # Load environment variables
 load_dotenv()
@@ -20,7 +34,14 @@ load_dotenv()
 # Create database tables
 create_tables()
 
-app = FastAPI(title="Markdown-to-Slides Agent", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Write back cache hits still waiting for their batch
+    await llm_cache.flush_hits(force=True)
+    shutdown_render_pool()
+
+app = FastAPI(title="Markdown-to-Slides Agent", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -47,19 +68,48 @@ if os.path.exists(static_dir):
     # Mount other static files
     app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
-# Initialize OpenAI
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
 # Pydantic models
 class ChatRequest(BaseModel):
     message: str
     conversation_id: Optional[str] = None
+    # Skip the LLM response cache and ask OpenAI again
+    bypass_cache: bool = False
+    # Also embed the deck HTML in the response; by default only its ID and URL are sent
+    include_html: bool = False
+    # Return the deck with a rule-based reply now and store the LLM commentary
+    # later; defaults to DEFER_COMMENTARY
+    defer_commentary: Optional[bool] = None
 
 class ChatResponse(BaseModel):
     message: str
+    deck_id: Optional[str] = None
+    # Relative URL serving the deck as text/html
+    deck_url: Optional[str] = None
     slides_html: Optional[str] = None
     theme_suggestion: Optional[str] = None
     conversation_id: str
+    message_id: Optional[int] = None
+    # 'pending' when LLM commentary will be available from the commentary endpoint
+    commentary_status: Optional[str] = None
+
+class GenerateSlidesRequest(BaseModel):
+    markdown: str = ""
+    theme: str = "professional"
+    mode: str = "inline"
+    # Also embed the deck HTML in the response; by default only its ID and URL are sent
+    include_html: bool = False
+
+class BatchSlidesDocument(BaseModel):
+    markdown: str
+    theme: str = "professional"
+    mode: str = "inline"
+
+class BatchSlidesRequest(BaseModel):
+    documents: List[BatchSlidesDocument]
+    stream: bool = False
+
+# Largest number of documents accepted by /generate-slides/batch
+MAX_BATCH_DOCUMENTS = int(os.getenv("MAX_BATCH_DOCUMENTS", "500"))
 
 class SlideTheme(BaseModel):
     name: str
@@ -97,61 +147,165 @@ slide_themes = {
     )
 }
 
-def parse_markdown_to_slides(markdown_content: str) -> List[dict]:
-    """Parse markdown content into individual slides"""
-    # Split by h1 or h2 headers to create slides
-    slides = []
-    
-    # Split content by headers
-    sections = re.split(r'^(#{1,2}\s+.+)$', markdown_content, flags=re.MULTILINE)
-    
-    current_slide = {"title": "", "content": ""}
+# Bump whenever parse_markdown_to_slides or generate_html_slides output changes
+RENDERER_VERSION = "2"
+
+# Python-Markdown extensions applied to slide bodies, e.g. "tables,fenced_code"
+MARKDOWN_EXTENSIONS = [name.strip() for name in os.getenv("MARKDOWN_EXTENSIONS", "").split(",") if name.strip()]
+
+# Everything besides the input that changes rendered output
+RENDER_SETTINGS = f"{RENDERER_VERSION}|{','.join(MARKDOWN_EXTENSIONS)}"
+
+# Markdown converters are not thread-safe, so each thread builds and reuses its own
+_converters = threading.local()
+
+def get_markdown_converter() -> markdown.Markdown:
+    """Get this thread's Markdown converter, reset and ready for a new document"""
+    converter = getattr(_converters, "converter", None)
+    if converter is None:
+        converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        _converters.converter = converter
+    return converter.reset()
+
+# Output mode for decks returned by /chat: "inline" (self-contained) or "linked"
+DECK_OUTPUT_MODE = os.getenv("DECK_OUTPUT_MODE", "inline")
+
+# Rendered decks keyed by (markdown, theme, renderer version)
+deck_cache = render_cache.create_render_cache()
+
+# Rendered slide bodies keyed by slide fingerprint, shared across decks and themes
+slide_fragment_cache = render_cache.MemoryStore(int(os.getenv("SLIDE_FRAGMENT_CACHE_MAX_BYTES", str(16 * 1024 * 1024))))
+
+# Packed /generate-slides response bodies (ETag digest + gzip bytes) keyed like deck_cache
+deck_response_cache = render_cache.MemoryStore(int(os.getenv("DECK_RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))))
+
+# Packed deck pages served by /decks/{id}, keyed by deck ID (the SHA-256 of the HTML)
+deck_page_cache = render_cache.MemoryStore(int(os.getenv("DECK_PAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))))
+
+# Read through the module globals so replaced caches are still reported
+metrics.CallbackMetric("slides_render_cache_hits_total", "Deck cache hits", lambda: deck_cache.hits, kind="counter")
+metrics.CallbackMetric("slides_render_cache_misses_total", "Deck cache misses", lambda: deck_cache.misses, kind="counter")
+metrics.CallbackMetric("slides_render_cache_evictions_total", "Deck cache evictions",
+                       lambda: deck_cache.store.evictions, kind="counter")
+
+def fingerprint_slide(slide: dict) -> str:
+    """Hash a slide's title and content so unchanged slides can be recognized"""
+    return render_cache.RenderCache.make_key(slide["title"], slide["content"])
+
+def render_slide_content(slide: dict) -> str:
+    """Convert a slide's markdown body to HTML, memoized per fingerprint"""
+    fingerprint = slide.get("fingerprint") or fingerprint_slide(slide)
+    key = f"{RENDER_SETTINGS}:{fingerprint}"
+    cached = slide_fragment_cache.get(key)
+    if cached is not None:
+        return cached.decode("utf-8")
+    content_html = get_markdown_converter().convert(slide["content"])
+    slide_fragment_cache.set(key, content_html.encode("utf-8"))
+    return content_html
+
+# Opening or closing line of a fenced code block (``` or ~~~)
+_FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_HEADER_PREFIX = re.compile(r'^#{1,2}\s+')
+
+def iter_markdown_slides(markdown_content: str) -> Iterator[dict]:
+    """Yield slides one at a time as a single pass over the lines completes them.
+
+    A line starting with `#` or `##` followed by whitespace opens a new slide,
+    except inside fenced code blocks. The text between headers is stripped
+    and added to the current slide as one section.
+    """
+    slide = {"title": "", "content": []}
+    section_lines = []  # raw lines since the last header
+    fence = None  # (fence character, fence length) while inside a code block
+    bare_header = None  # a lone `#`/`##` line and the blank lines after it
+    emitted = False
     
-    for i, section in enumerate(sections):
+    def add_section(section: str):
+        nonlocal slide, emitted
         section = section.strip()
         if not section:
+            return
+        if not _HEADER_PREFIX.match(section):
+            slide["content"].append(section + "\n")
+            return
+        # Save previous slide if it has content, then start a new one
+        if slide["title"] or slide["content"]:
+            yield _finish_slide(slide)
+            emitted = True
+        slide = {"title": _HEADER_PREFIX.sub('', section), "content": []}
+    
+    def end_section():
+        section = "\n".join(section_lines)
+        section_lines.clear()
+        return add_section(section)
+    
+    for line in markdown_content.split("\n"):
+        if bare_header is not None:
+            # A lone `#` takes the next non-blank line as its title
+            if not line.strip():
+                bare_header.append(line)
+                continue
+            yield from end_section()
+            yield from add_section(bare_header[0] + "\n" + line)
+            bare_header = None
             continue
-            
-        # Check if it's a header
-        if re.match(r'^#{1,2}\s+', section):
-            # Save previous slide if it has content
-            if current_slide["title"] or current_slide["content"]:
-                slides.append(current_slide.copy())
-            
-            # Start new slide
-            current_slide = {
-                "title": re.sub(r'^#{1,2}\s+', '', section),
-                "content": ""
-            }
+        
+        if fence is not None:
+            match = _FENCE_PATTERN.match(line)
+            if match and match.group(1)[0] == fence[0] and len(match.group(1)) >= fence[1] and not line[match.end():].strip():
+                fence = None
+            section_lines.append(line)
+            continue
+        
+        if line.startswith("#") and not line.startswith("###"):
+            rest = line[2:] if line.startswith("##") else line[1:]
+            if not rest or rest[0].isspace():
+                if not rest.strip():
+                    bare_header = [line]
+                    continue
+                yield from end_section()
+                yield from add_section(line)
+                continue
+        
+        match = _FENCE_PATTERN.match(line)
+        if match:
+            fence = (match.group(1)[0], len(match.group(1)))
+        section_lines.append(line)
+    
+    if bare_header is not None:
+        # Only whitespace follows a lone `#`. It is still split off as its own
+        # section when some non-newline whitespace trails it; otherwise it is
+        # part of the current section.
+        hashes = bare_header[0].rstrip()
+        if "\n".join(bare_header)[len(hashes) + 1:].strip("\n"):
+            yield from end_section()
+            yield from add_section(hashes)
         else:
-            # Add content to current slide
-            current_slide["content"] += section + "\n"
+            section_lines.extend(bare_header)
     
     # Add the last slide
-    if current_slide["title"] or current_slide["content"]:
-        slides.append(current_slide)
+    yield from end_section()
+    if slide["title"] or slide["content"]:
+        yield _finish_slide(slide)
+        emitted = True
     
     # If no slides were created from headers, create one slide with all content
-    if not slides:
-        slides.append({
-            "title": "Presentation",
-            "content": markdown_content
-        })
-    
-    return slides
+    if not emitted:
+        yield _finish_slide({"title": "Presentation", "content": [markdown_content]})
 
-def generate_html_slides(slides: List[dict], theme: SlideTheme) -> str:
-    """Generate HTML slide deck from parsed slides"""
-    
-    html_template = f'''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Generated Slides</title>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;700&family=Poppins:wght@300;400;600;700&family=Source+Sans+Pro:wght@300;400;600;700&display=swap');
+def _finish_slide(slide: dict) -> dict:
+    """Join a slide's collected sections and fingerprint it"""
+    finished = {"title": slide["title"], "content": "".join(slide["content"])}
+    finished["fingerprint"] = fingerprint_slide(finished)
+    return finished
+
+def parse_markdown_to_slides(markdown_content: str) -> List[dict]:
+    """Parse markdown content into individual slides"""
+    return list(iter_markdown_slides(markdown_content))
+
+def theme_stylesheet(theme: SlideTheme) -> str:
+    """Build the CSS for a theme"""
+    return f'''        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;700&family=Poppins:wght@300;400;600;700&family=Source+Sans+Pro:wght@300;400;600;700&display=swap');
         
         * {{
             margin: 0;
@@ -264,37 +418,10 @@ def generate_html_slides(slides: List[dict], theme: SlideTheme) -> str:
                 padding: 40px 20px;
             }}
         }}
-    </style>
-</head>
-<body>
-    <div class="slide-counter">
-        <span id="current-slide">1</span> / <span id="total-slides">{len(slides)}</span>
-    </div>
 '''
 
-    # Add slides
-    for i, slide in enumerate(slides):
-        active_class = "active" if i == 0 else ""
-        content_html = markdown.markdown(slide["content"])
-        
-        html_template += f'''
-    <div class="slide-container {active_class}" data-slide="{i}">
-        <h1 class="slide-title">{slide["title"]}</h1>
-        <div class="slide-content">
-            {content_html}
-        </div>
-    </div>
-'''
-
-    # Add navigation and JavaScript
-    html_template += '''
-    <div class="navigation">
-        <button class="nav-btn" id="prev-btn">← Previous</button>
-        <button class="nav-btn" id="next-btn">Next →</button>
-    </div>
-
-    <script>
-        let currentSlide = 0;
+# Slide navigation runtime shared by every deck
+NAVIGATOR_SCRIPT = '''        let currentSlide = 0;
         const totalSlides = document.querySelectorAll('.slide-container').length;
         
         function showSlide(n) {
@@ -378,39 +505,279 @@ def generate_html_slides(slides: List[dict], theme: SlideTheme) -> str:
             // Initialize
             showSlide(0);
         });
-    </script>
-</body>
-</html>
 '''
-    
-    return html_template
 
-async def get_ai_response(user_message: str) -> dict:
-    """Get AI response for chat and slide generation with fallback for API issues"""
-    
-    # Check if OpenAI API key is available and valid
-    api_key = os.getenv("OPENAI_API_KEY")
+# Static deck assets by filename, each as (content, media type)
+deck_assets = {}
+
+# Prefix for linked asset URLs, e.g. the backend origin when decks are shown elsewhere
+ASSET_BASE_URL = os.getenv("ASSET_BASE_URL", "")
+
+def register_deck_asset(stem: str, extension: str, content: str, media_type: str) -> str:
+    """Register a static asset under a content-hashed filename and return its URL"""
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    filename = f"{stem}.{digest}.{extension}"
+    deck_assets[filename] = (content, media_type)
+    return f"{ASSET_BASE_URL}/assets/{filename}"
+
+def theme_stylesheet_url(theme: SlideTheme) -> str:
+    """Get the URL of a theme's linked stylesheet"""
+    return register_deck_asset(f"theme-{theme.name.lower()}", "css", theme_stylesheet(theme), "text/css")
+
+NAVIGATOR_SCRIPT_URL = register_deck_asset("navigator", "js", NAVIGATOR_SCRIPT, "application/javascript")
+
+# Register every theme up front so any worker can serve any deck's stylesheet
+for _theme in slide_themes.values():
+    theme_stylesheet_url(_theme)
+
+_LINKED_ASSET_TAG = re.compile(
+    r'    <link rel="stylesheet" href="' + re.escape(ASSET_BASE_URL) + r'/assets/([^"]+)">\n'
+    r'|    <script src="' + re.escape(ASSET_BASE_URL) + r'/assets/([^"]+)"></script>\n'
+)
+
+def inline_deck_assets(html: str) -> str:
+    """Turn a linked-mode deck into the self-contained inline deck.
+
+    Each asset tag is swapped for the block generate_html_slides writes in
+    inline mode, so the result matches an inline render. Unknown assets are
+    left linked.
+    """
+    def inline(match) -> str:
+        stylesheet, script = match.groups()
+        asset = deck_assets.get(stylesheet or script)
+        if asset is None:
+            return match.group(0)
+        content = asset[0]
+        if stylesheet:
+            return f"    <style>\n{content}    </style>\n"
+        return f"    <script>\n{content}    </script>\n"
     
-    # Analyze if this looks like meaningful markdown content for slides
-    has_headers = any(indicator in user_message for indicator in ['#', '##', '###'])
-    has_sufficient_content = len(user_message.strip()) > 50  # Minimum content length
-    mentions_slides = any(word in user_message.lower() for word in ['markdown', 'slide', 'presentation'])
+    return _LINKED_ASSET_TAG.sub(inline, html)
+
+def generate_html_slides(slides: List[dict], theme: SlideTheme, mode: str = "inline") -> str:
+    """Generate HTML slide deck from parsed slides.
+
+    In "inline" mode the deck is self-contained. In "linked" mode the theme
+    CSS and navigation script are referenced as cacheable static assets.
+    """
+    if mode == "linked":
+        head_assets = f'''    <link rel="stylesheet" href="{theme_stylesheet_url(theme)}">
+'''
+        body_assets = f'''    <script src="{NAVIGATOR_SCRIPT_URL}"></script>
+'''
+    else:
+        head_assets = f'''    <style>
+{theme_stylesheet(theme)}    </style>
+'''
+        body_assets = f'''    <script>
+{NAVIGATOR_SCRIPT}    </script>
+'''
     
-    # Only generate slides if there are actual headers AND sufficient content
-    has_markdown = has_headers and has_sufficient_content
+    parts = [f'''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Generated Slides</title>
+{head_assets}</head>
+<body>
+    <div class="slide-counter">
+        <span id="current-slide">1</span> / <span id="total-slides">{len(slides)}</span>
+    </div>
+''']
+
+    # Add slides
+    for i, slide in enumerate(slides):
+        active_class = "active" if i == 0 else ""
+        content_html = render_slide_content(slide)
+        
+        parts.append(f'''
+    <div class="slide-container {active_class}" data-slide="{i}">
+        <h1 class="slide-title">{slide["title"]}</h1>
+        <div class="slide-content">
+            {content_html}
+        </div>
+    </div>
+''')
+
+    # Add navigation and JavaScript
+    parts.append(f'''
+    <div class="navigation">
+        <button class="nav-btn" id="prev-btn">← Previous</button>
+        <button class="nav-btn" id="next-btn">Next →</button>
+    </div>
+
+{body_assets}</body>
+</html>
+''')
     
-    # Simple theme suggestion based on content
-    theme_name = "professional"  # default
-    if any(word in user_message.lower() for word in ['creative', 'fun', 'colorful', 'vibrant', 'modern']):
-        theme_name = "creative"
-    elif any(word in user_message.lower() for word in ['minimal', 'simple', 'clean', 'basic']):
-        theme_name = "minimal"
+    return "".join(parts)
+
+def deck_cache_key(markdown_content: str, theme: SlideTheme, mode: str) -> str:
+    """Cache key covering every input that affects a rendered deck"""
+    return render_cache.RenderCache.make_key(RENDER_SETTINGS, mode, theme.model_dump_json(), markdown_content)
+
+def render_deck_timed(markdown_content: str, theme: SlideTheme, mode: str = "inline") -> tuple:
+    """Parse and render a deck, returning (deck, parse_seconds, render_seconds).
+
+    Runs in render worker processes too, so the timings are handed back for
+    the parent to record rather than observed here.
+    """
+    start = time.perf_counter()
+    slides = parse_markdown_to_slides(markdown_content)
+    parsed = time.perf_counter()
+    deck = {
+        "html": generate_html_slides(slides, theme, mode),
+        "slides_count": len(slides)
+    }
+    return deck, parsed - start, time.perf_counter() - parsed
+
+def record_render_metrics(deck: dict, parse_seconds: float, render_seconds: float) -> None:
+    metrics.parse_seconds.observe(parse_seconds)
+    metrics.render_seconds.observe(render_seconds)
+    metrics.decks_rendered_total.inc()
+    metrics.slides_rendered_total.inc(deck["slides_count"])
+    metrics.output_bytes_total.inc(len(deck["html"]))
+
+# Worker processes for CPU-bound rendering, created on first use; 0 renders everything inline
+RENDER_PROCESSES = int(os.getenv("RENDER_PROCESSES", str(os.cpu_count() or 1)))
+
+# Documents at least this long, or with at least this many headers, render in a
+# worker process; smaller ones are faster to render inline than to ship across
+RENDER_OFFLOAD_MIN_CHARS = int(os.getenv("RENDER_OFFLOAD_MIN_CHARS", str(64 * 1024)))
+RENDER_OFFLOAD_MIN_SLIDES = int(os.getenv("RENDER_OFFLOAD_MIN_SLIDES", "100"))
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Get the rendering process pool, creating it on first use"""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(max_workers=RENDER_PROCESSES)
+    return _render_pool
+
+def run_in_render_pool(func, *args) -> asyncio.Future:
+    """Submit a call to the rendering pool, rebuilding the pool if a worker has died"""
+    global _render_pool
+    loop = asyncio.get_running_loop()
+    pool = get_render_pool()
+    try:
+        return loop.run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        # The render that killed the worker has already failed; later ones get a fresh pool
+        print("Render worker died; restarting the render pool")
+        pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+        return loop.run_in_executor(get_render_pool(), func, *args)
+
+def shutdown_render_pool():
+    """Stop the rendering worker processes"""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(cancel_futures=True)
+        _render_pool = None
+
+def should_offload_render(markdown_content: str) -> bool:
+    """Decide whether a document is big enough to render in a worker process"""
+    if RENDER_PROCESSES <= 0:
+        return False
+    if len(markdown_content) >= RENDER_OFFLOAD_MIN_CHARS:
+        return True
+    # Upper bound on the slide count without parsing
+    return markdown_content.count("\n#") + 1 >= RENDER_OFFLOAD_MIN_SLIDES
+
+async def render_deck_async(
+    markdown_content: str,
+    theme: SlideTheme,
+    mode: str = "inline",
+    offload: Optional[bool] = None,
+    profile=profiling.NO_PROFILE
+) -> dict:
+    """Parse and render a deck, reusing a cached render when the inputs match.
+
+    Large cache misses render in a worker process.
+
+    `offload` forces the choice; by default it follows the size thresholds.
+    An active `profile` skips the lookup and renders inline inside it.
+    """
+    key = deck_cache_key(markdown_content, theme, mode)
+    if profile.active:
+        return await render_and_cache_deck(key, markdown_content, theme, mode, False, profile)
     
-    # Try OpenAI API first, then fallback to rule-based responses
-    if api_key and api_key.startswith('sk-'):
-        try:
-            # Create a prompt for the AI
-            prompt = f'''
+    deck = await deck_cache.get_async(key)
+    if deck is not None:
+        return deck
+    # Identical decks already rendering share that render
+    return await render_flights.do(key, lambda: render_and_cache_deck(key, markdown_content, theme, mode, offload))
+
+render_flights = SingleFlight("render")
+
+async def render_and_cache_deck(
+    key: str,
+    markdown_content: str,
+    theme: SlideTheme,
+    mode: str,
+    offload: Optional[bool],
+    profile=profiling.NO_PROFILE
+) -> dict:
+    if offload is None:
+        offload = should_offload_render(markdown_content)
+    if offload and RENDER_PROCESSES > 0:
+        deck, parse_seconds, render_seconds = await run_in_render_pool(
+            render_deck_timed, markdown_content, theme, mode
+        )
+    else:
+        with profile.capture():
+            deck, parse_seconds, render_seconds = render_deck_timed(markdown_content, theme, mode)
+    record_render_metrics(deck, parse_seconds, render_seconds)
+    await deck_cache.set_async(key, deck)
+    return deck
+
+DECK_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+def deck_url(deck_id: str) -> str:
+    return f"/decks/{deck_id}"
+
+async def pack_body(encoded: http_cache.EncodedBody) -> bytes:
+    """Pack a body for a response cache; zlib releases the GIL, so large bodies compress off the event loop"""
+    if len(encoded.body) >= RENDER_OFFLOAD_MIN_CHARS:
+        return await asyncio.to_thread(encoded.pack)
+    return encoded.pack()
+
+async def publish_deck_page(html: str) -> str:
+    """Make a rendered deck servable from deck_page_cache and return its deck ID"""
+    encoded = http_cache.EncodedBody(html.encode("utf-8"))
+    if deck_page_cache.get(encoded.digest) is None:
+        deck_page_cache.set(encoded.digest, await pack_body(encoded))
+    return encoded.digest
+
+def resolve_theme_name(theme_name: str) -> str:
+    """Fall back to the professional theme for unknown names"""
+    return theme_name if theme_name in slide_themes else "professional"
+
+def resolve_output_mode(mode: str) -> str:
+    """Fall back to self-contained output for unknown modes"""
+    return mode if mode in ("inline", "linked") else "inline"
+
+SYSTEM_PROMPT = "You are a helpful AI assistant that specializes in creating slide presentations from markdown content."
+
+def has_openai_key() -> bool:
+    """Check if an OpenAI API key is configured"""
+    api_key = os.getenv("OPENAI_API_KEY")
+    return bool(api_key and api_key.startswith('sk-'))
+
+def analyze_message(user_message: str) -> dict:
+    """Decide whether a message should become slides, which theme fits it and what the user wants"""
+    analysis = classifier.classify(user_message)
+    # The keyword table may name themes this server does not have
+    analysis["suggested_theme"] = resolve_theme_name(analysis["suggested_theme"])
+    return analysis
+
+def build_llm_messages(user_message: str) -> List[dict]:
+    """Build the chat completion messages for a user message"""
+    # Create a prompt for the AI
+    prompt = f'''
 You are a helpful AI agent that converts markdown to slide presentations and suggests themes.
 
 User message: "{user_message}"
@@ -424,33 +791,17 @@ If the user is asking for changes or has questions, respond conversationally.
 
 Respond in a friendly, helpful tone. Keep responses concise but informative.
 '''
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
 
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI assistant that specializes in creating slide presentations from markdown content."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            ai_response = response.choices[0].message.content
-            
-            return {
-                "message": ai_response,
-                "has_markdown": has_markdown,
-                "suggested_theme": theme_name
-            }
-            
-        except Exception as e:
-            print(f"OpenAI API Error: {str(e)}")
-            # Fall through to rule-based response
-    
-    # Fallback rule-based responses when OpenAI API is not available
-    if has_markdown:
-        slide_count = user_message.count('#')
-        ai_response = f"""Perfect! I've detected markdown content with {slide_count} sections. 
+def get_rule_based_response(analysis: dict) -> str:
+    """Fallback rule-based responses when OpenAI API is not available"""
+    if analysis["has_markdown"]:
+        slide_count = analysis["slide_estimate"]
+        theme_name = analysis["suggested_theme"]
+        return f"""Perfect! I've detected markdown content with {slide_count} sections. 
         
 I'll convert this into a beautiful slide presentation for you! Here's what I found:
 
@@ -461,10 +812,10 @@ I'll convert this into a beautiful slide presentation for you! Here's what I fou
 📝 **Pro tip**: Your slides look great! You can switch themes and preview them on the right side.
 
 Your slides are being generated now! 🚀"""
-    else:
-        # Check if user is asking for help or just chatting
-        if any(word in user_message.lower() for word in ['help', 'how', 'what', 'hello', 'hi']):
-            ai_response = """Hello! I'm your Markdown-to-Slides Agent. 🎯
+    
+    # Check if user is asking for help or just chatting
+    if analysis["intent"] == "help":
+        return """Hello! I'm your Markdown-to-Slides Agent. 🎯
 
 I can help you convert markdown content into beautiful slide presentations! Here's how:
 
@@ -479,8 +830,8 @@ Just paste your markdown content and I'll get started! You can include:
 - Any text you want to present
 
 What would you like to create slides about?"""
-        else:
-            ai_response = """I'd be happy to help you create slides! 
+    
+    return """I'd be happy to help you create slides! 
 
 To generate a slide presentation, please paste your markdown content with headings like:
 
@@ -493,25 +844,192 @@ More content...
 ```
 
 I'll convert it into beautiful slides with theme suggestions. Try the "Demo" button above for an example! 🎯"""
+
+COMPLETION_PARAMS = {"max_tokens": 500, "temperature": 0.7}
+
+ai_response_flights = SingleFlight("ai_response")
+
+async def get_ai_response(user_message: str, bypass_cache: bool = False) -> dict:
+    """Get AI response for chat and slide generation with fallback for API issues.
+
+    Concurrent identical messages, such as double-clicks and retries, share one response.
+    """
+    key = (bypass_cache, llm_cache.normalize_prompt(user_message))
+    return await ai_response_flights.do(key, lambda: compute_ai_response(user_message, bypass_cache))
+
+async def compute_ai_response(user_message: str, bypass_cache: bool = False) -> dict:
+    analysis = analyze_message(user_message)
+    
+    # Try OpenAI API first, then fallback to rule-based responses
+    if has_openai_key():
+        try:
+            ai_response = await llm_cache.cached_chat_completion(
+                messages=build_llm_messages(user_message),
+                bypass=bypass_cache,
+                **COMPLETION_PARAMS
+            )
+            
+            return {"message": ai_response, **analysis}
+            
+        except asyncio.TimeoutError:
+            print(f"OpenAI API Error: completion timed out after {llm.LLM_TIMEOUT_SECONDS}s")
+            metrics.openai_errors_total.inc(reason="timeout")
+            # Fall through to rule-based response
+        except Exception as e:
+            print(f"OpenAI API Error: {str(e)}")
+            metrics.openai_errors_total.inc(reason=type(e).__name__)
+            # Fall through to rule-based response
+    
+    metrics.fallback_responses_total.inc()
+    ai_response = get_rule_based_response(analysis)
+    return {"message": ai_response, **analysis}
+
+async def stream_ai_response(user_message: str, analysis: dict, bypass_cache: bool = False):
+    """Yield the AI response in chunks as the completion streams in.
+
+    A cached completion is yielded as a single chunk. Falls back to the
+    rule-based response, as a single chunk, when OpenAI is unavailable or
+    fails before producing any tokens.
+    """
+    if has_openai_key():
+        messages = build_llm_messages(user_message)
+        cache_key = llm_cache.make_key(messages, **COMPLETION_PARAMS)
+        cached = await llm_cache.lookup(cache_key, bypass_cache)
+        if cached is not None:
+            yield cached
+            return
+        
+        streamed_any = False
+        chunks = []
+        start = time.perf_counter()
+        try:
+            async for delta in llm.stream_chat_completion(messages=messages, **COMPLETION_PARAMS):
+                streamed_any = True
+                chunks.append(delta)
+                yield delta
+            if streamed_any:
+                metrics.llm_request_seconds.observe(time.perf_counter() - start, mode="stream")
+                # Only complete streams are cached
+                await llm_cache.store(cache_key, "".join(chunks))
+                return
+        except Exception as e:
+            print(f"OpenAI API Error: {str(e)}")
+            metrics.openai_errors_total.inc(reason=type(e).__name__)
+            if streamed_any:
+                # Keep the partial answer rather than appending a second one
+                return
+    
+    metrics.fallback_responses_total.inc()
+    yield get_rule_based_response(analysis)
+
+async def render_chat_slides(user_message: str, ai_result: dict, profile=profiling.NO_PROFILE):
+    """Render slides for a chat message, returning (slides_html, theme_suggestion).
+
+    Profiled requests render fresh and inline so the work shows up in the profile.
+    """
+    slides_html = None
+    theme_suggestion = None
+    
+    if ai_result["has_headers"]:
+        # Parse markdown and generate slides
+        theme = slide_themes[ai_result["suggested_theme"]]
+        deck = await render_deck_async(user_message, theme, DECK_OUTPUT_MODE, profile=profile)
+        slides_html = deck["html"]
+        theme_suggestion = f"I suggest the '{theme.name}' theme: {theme.description}"
     
+    return slides_html, theme_suggestion
+
+# Default for ChatRequest.defer_commentary
+DEFER_COMMENTARY = os.getenv("DEFER_COMMENTARY", "false").lower() == "true"
+
+def get_deferred_chat_result(request: ChatRequest) -> Optional[dict]:
+    """Rule-based result to answer with now when the LLM commentary is deferred, else None.
+
+    Only messages that produce a deck are deferred; without a deck there is
+    nothing to show before the commentary arrives.
+    """
+    defer = DEFER_COMMENTARY if request.defer_commentary is None else request.defer_commentary
+    if not defer or not has_openai_key():
+        return None
+    analysis = analyze_message(request.message)
+    if not analysis["has_headers"]:
+        return None
+    return {"message": get_rule_based_response(analysis), **analysis}
+
+async def store_deferred_commentary(conversation_id: str, message_id: int, user_message: str, bypass_cache: bool):
+    """Background task: fetch the LLM commentary for a chat turn and store it as a reply.
+
+    Any failure marks the message 'failed', so pollers never wait on 'pending' forever.
+    """
+    try:
+        commentary = await llm_cache.cached_chat_completion(
+            messages=build_llm_messages(user_message),
+            bypass=bypass_cache,
+            latency_mode="deferred",
+            **COMPLETION_PARAMS
+        )
+    except Exception as e:
+        print(f"OpenAI API Error: {str(e) or type(e).__name__}")
+        metrics.openai_errors_total.inc(reason="timeout" if isinstance(e, asyncio.TimeoutError) else type(e).__name__)
+        await mark_commentary_failed(message_id)
+        return
+    try:
+        await run_db(crud.store_commentary, conversation_id, message_id, commentary)
+    except Exception as e:
+        print(f"Error storing commentary: {str(e)}")
+        await mark_commentary_failed(message_id)
+
+async def mark_commentary_failed(message_id: int):
+    try:
+        await run_db(crud.set_commentary_status, message_id, "failed")
+    except Exception as e:
+        print(f"Error marking commentary failed: {str(e)}")
+
+def serialize_message(message) -> dict:
+    """Convert a stored message to its API representation"""
     return {
-        "message": ai_response,
-        "has_markdown": has_markdown,
-        "suggested_theme": theme_name
+        "id": message.id,
+        "conversation_id": message.conversation_id,
+        "role": message.role,
+        "content": message.content,
+        "deck_id": message.deck_id,
+        "deck_url": deck_url(message.deck_id) if message.deck_id else None,
+        "theme_suggestion": message.theme_suggestion,
+        "slides_generated": message.slides_generated,
+        "commentary_status": message.commentary_status,
+        "commentary_for_id": message.commentary_for_id,
+        "timestamp": message.timestamp
     }
 
+def format_sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @app.get("/api/")
 async def api_root():
-    api_key = os.getenv("OPENAI_API_KEY")
-    has_openai = api_key and api_key.startswith('sk-')
+    has_openai = has_openai_key()
     
     return {
         "message": "Markdown-to-Slides Agent API", 
         "status": "running",
         "openai_enabled": has_openai,
-        "mode": "AI-powered" if has_openai else "Demo mode (rule-based responses)"
+        "mode": "AI-powered" if has_openai else "Demo mode (rule-based responses)",
+        "render_cache": deck_cache.stats(),
+        "database_pool": get_pool_status(),
+        "llm_cache": {**llm_cache.stats.snapshot(), **await run_db(crud.get_llm_cache_summary)},
+        "coalescing": {
+            "ai_response": ai_response_flights.stats(),
+            "render": render_flights.stats()
+        }
     }
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Expose pipeline metrics in the Prometheus text format"""
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.render_latest(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/")
 async def serve_frontend():
     """Serve the frontend HTML file"""
@@ -524,10 +1042,7 @@ async def serve_frontend():
         # Fallback to API response if frontend not found
         return {"message": "Markdown-to-Slides Agent API - Frontend not built yet"}
 
-@app.get("/demo")
-async def demo_endpoint():
-    """Get demo markdown content for testing"""
-    demo_markdown = """# Welcome to Markdown-to-Slides Agent
+DEMO_MARKDOWN = """# Welcome to Markdown-to-Slides Agent
 
 ## What is this?
 A smart AI agent that converts your markdown into beautiful slide presentations!
@@ -555,113 +1070,389 @@ Built with FastAPI, Next.js, and OpenAI for the ultimate slide creation experien
 
 *Thank you for trying the Markdown-to-Slides Agent!*"""
 
-    return {
-        "markdown": demo_markdown,
-        "description": "Demo content showing various markdown features"
-    }
+demo_body = http_cache.EncodedBody.from_content({
+    "markdown": DEMO_MARKDOWN,
+    "description": "Demo content showing various markdown features"
+})
+
+@app.get("/demo")
+@app.head("/demo")
+async def demo_endpoint(http_request: Request):
+    """Get demo markdown content for testing"""
+    return http_cache.respond(http_request, demo_body, cache_control="public, no-cache")
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat_endpoint(
+    request: ChatRequest,
+    http_request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks
+):
     """Main chat endpoint that handles conversations and slide generation"""
     
     # Generate conversation ID if not provided
     conversation_id = request.conversation_id or f"conv_{datetime.now().timestamp()}"
     
-    # Get AI response
-    ai_result = await get_ai_response(request.message)
+    # Admins can profile this request by sending the profiling token header
+    profile = profiling.profile_for(http_request, "chat")
+    with profile.capture():
+        ai_result = get_deferred_chat_result(request)
+    commentary_status = "pending" if ai_result is not None else None
+    if ai_result is None:
+        # Get AI response, giving up on the completion if the client disconnects
+        ai_result = await llm.run_until_disconnected(http_request, get_ai_response(request.message, request.bypass_cache))
+        if ai_result is None:
+            raise HTTPException(status_code=499, detail="Client closed request")
     
-    # Check if user provided markdown content
-    slides_html = None
-    theme_suggestion = None
-    
-    if ai_result["has_markdown"] or any(char in request.message for char in ['#', '##', '###']):
-        # Parse markdown and generate slides
-        slides = parse_markdown_to_slides(request.message)
-        
-        if slides:
-            theme = slide_themes[ai_result["suggested_theme"]]
-            slides_html = generate_html_slides(slides, theme)
-            theme_suggestion = f"I suggest the '{theme.name}' theme: {theme.description}"
+    slides_html, theme_suggestion = await render_chat_slides(request.message, ai_result, profile)
     
     # Store conversation in database
-    # Check if conversation exists, create if not
-    if not crud.get_conversation(db, conversation_id):
-        crud.create_conversation(db, conversation_id)
-    
-    # Store user message
-    crud.create_message(
-        db=db,
-        conversation_id=conversation_id,
-        role="user",
-        content=request.message
+    message_id = await run_db(
+        crud.create_chat_turn, conversation_id, request.message, ai_result["message"],
+        slides_html, theme_suggestion, commentary_status
     )
+    deck_id = await publish_deck_page(slides_html) if slides_html is not None else None
+    await profile.save()
+    profile.attach_id(response)
     
-    # Store AI response
-    crud.create_message(
-        db=db,
-        conversation_id=conversation_id,
-        role="assistant",
-        content=ai_result["message"],
-        slides_html=slides_html,
-        theme_suggestion=theme_suggestion,
-        slides_generated=slides_html is not None
-    )
+    if commentary_status == "pending":
+        background_tasks.add_task(
+            store_deferred_commentary, conversation_id, message_id, request.message, request.bypass_cache
+        )
     
     return ChatResponse(
         message=ai_result["message"],
-        slides_html=slides_html,
+        deck_id=deck_id,
+        deck_url=deck_url(deck_id) if deck_id else None,
+        slides_html=slides_html if request.include_html else None,
         theme_suggestion=theme_suggestion,
-        conversation_id=conversation_id
+        conversation_id=conversation_id,
+        message_id=message_id,
+        commentary_status=commentary_status
     )
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Streaming variant of /chat that sends the reply as Server-Sent Events.
+
+    Emits `token` events as the assistant reply arrives, a `slides_ready` event
+    with the rendered deck, and a final `persisted` event once stored.
+    """
+    conversation_id = request.conversation_id or f"conv_{datetime.now().timestamp()}"
+    
+    async def event_stream():
+        # Starlette cancels this generator if the client disconnects, which
+        # also cancels the in-flight completion.
+        analysis = analyze_message(request.message)
+        chunks = []
+        async for delta in stream_ai_response(request.message, analysis, request.bypass_cache):
+            chunks.append(delta)
+            yield format_sse_event("token", {"delta": delta})
+        ai_message = "".join(chunks)
+        
+        slides_html, theme_suggestion = await render_chat_slides(request.message, analysis)
+        deck_id = None
+        if slides_html is not None:
+            deck_id = await publish_deck_page(slides_html)
+            # Store the deck before announcing its URL, which any worker may serve
+            await run_db(crud.save_deck, slides_html)
+        yield format_sse_event("slides_ready", {
+            "deck_id": deck_id,
+            "deck_url": deck_url(deck_id) if deck_id else None,
+            "slides_html": slides_html if request.include_html else None,
+            "theme_suggestion": theme_suggestion,
+            "conversation_id": conversation_id
+        })
+        
+        message_id = await run_db(crud.create_chat_turn, conversation_id, request.message, ai_message, slides_html, theme_suggestion)
+        yield format_sse_event("persisted", {
+            "conversation_id": conversation_id,
+            "message_id": message_id
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+themes_body = http_cache.EncodedBody.from_content({"themes": slide_themes})
+
 @app.get("/themes")
-async def get_themes():
+@app.head("/themes")
+async def get_themes(http_request: Request):
     """Get available slide themes"""
-    return {"themes": slide_themes}
+    return http_cache.respond(http_request, themes_body, cache_control="public, no-cache")
+
+@app.get("/assets/{filename}")
+async def get_deck_asset(filename: str):
+    """Serve a content-hashed deck stylesheet or script"""
+    asset = deck_assets.get(filename)
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    content, media_type = asset
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+def require_profile_admin(http_request: Request):
+    if not profiling.PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not profiling.is_authorized(http_request):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+@app.get("/profiles")
+async def list_request_profiles(http_request: Request):
+    """List stored request profiles, newest first"""
+    require_profile_admin(http_request)
+    return {"profiles": list(reversed(profiling.list_profiles()))}
+
+@app.get("/profiles/{profile_id}")
+async def get_request_profile(profile_id: str, http_request: Request, format: str = Query("pstats", pattern="^(pstats|text)$")):
+    """Download a stored profile as .pstats, or as a text summary with format=text"""
+    require_profile_admin(http_request)
+    path = profiling.profile_path(profile_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    if format == "text":
+        summary = await asyncio.to_thread(profiling.format_profile, path)
+        return Response(content=summary, media_type="text/plain; charset=utf-8")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.pstats")
 
 @app.get("/conversations/{conversation_id}")
-async def get_conversation_history(conversation_id: str, db: Session = Depends(get_db)):
-    """Get conversation history"""
-    conversation = crud.get_conversation(db, conversation_id)
+async def get_conversation_history(
+    conversation_id: str,
+    after: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200)
+):
+    """Get a page of conversation history.
+
+    Decks are not included; fetch them per message from
+    /conversations/{conversation_id}/messages/{message_id}/slides.
+    """
+    conversation = await run_db(crud.get_conversation, conversation_id)
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    messages = crud.get_conversation_messages(db, conversation_id)
+    messages = await run_db(crud.get_conversation_messages, conversation_id, after=after, limit=limit)
     return {
         "conversation_id": conversation_id,
         "created_at": conversation.created_at,
-        "messages": messages
+        "messages": [serialize_message(message) for message in messages],
+        # Pass as ?after= to get the next page
+        "next_after": messages[-1].id if len(messages) == limit else None
+    }
+
+@app.get("/conversations/{conversation_id}/messages/{message_id}/commentary")
+async def get_message_commentary(conversation_id: str, message_id: int, response: Response):
+    """Poll for the deferred LLM commentary on a chat reply.
+
+    `status` is 'pending', 'ready', 'failed', or null when the reply was
+    not deferred; `message` holds the commentary once it is ready.
+    """
+    result = await run_db(crud.get_commentary, conversation_id, message_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Message not found")
+    
+    status, commentary = result
+    if status == "pending":
+        response.headers["Retry-After"] = "1"
+    return {
+        "message_id": message_id,
+        "status": status,
+        "message": serialize_message(commentary) if commentary is not None else None
+    }
+
+@app.get("/decks/{deck_id}")
+@app.head("/decks/{deck_id}")
+async def get_deck(deck_id: str, http_request: Request, download: bool = False):
+    """Serve a deck as HTML. Decks are content-addressed, so responses never change."""
+    if not DECK_ID_PATTERN.match(deck_id):
+        raise HTTPException(status_code=404, detail="Deck not found")
+    
+    packed = deck_page_cache.get(deck_id)
+    if packed is not None:
+        encoded = http_cache.EncodedBody.unpack(packed)
+    else:
+        html = await run_db(crud.get_deck_html, deck_id)
+        if html is None:
+            raise HTTPException(status_code=404, detail="Deck not found")
+        encoded = http_cache.EncodedBody(html.encode("utf-8"))
+        deck_page_cache.set(deck_id, await pack_body(encoded))
+    
+    if download:
+        # Saved files can't reach /assets, so linked decks are downloaded inline
+        html = encoded.body.decode("utf-8")
+        inlined = inline_deck_assets(html)
+        if inlined != html:
+            encoded = http_cache.EncodedBody(inlined.encode("utf-8"))
+    
+    response = http_cache.respond(
+        http_request,
+        encoded,
+        cache_control="public, max-age=31536000, immutable",
+        media_type="text/html; charset=utf-8"
+    )
+    # Decks can carry raw HTML from user markdown; run them in an opaque origin
+    response.headers["Content-Security-Policy"] = "sandbox allow-scripts allow-popups"
+    if download:
+        response.headers["Content-Disposition"] = 'attachment; filename="slides.html"'
+    return response
+
+@app.get("/conversations/{conversation_id}/messages/{message_id}/slides")
+async def get_message_slides(conversation_id: str, message_id: int):
+    """Get the deck generated for one message"""
+    message = await run_db(crud.get_message_slides, conversation_id, message_id)
+    if not message:
+        raise HTTPException(status_code=404, detail="Message not found")
+    
+    slides_html = message.slides_html
+    if slides_html is None:
+        raise HTTPException(status_code=404, detail="Message has no slides")
+    
+    return {
+        "message_id": message.id,
+        "deck_id": message.deck_id,
+        "deck_url": deck_url(message.deck_id) if message.deck_id else None,
+        "slides_html": slides_html
     }
 
 @app.get("/conversations")
-async def get_recent_conversations(db: Session = Depends(get_db)):
-    """Get recent conversations"""
-    conversations = crud.get_recent_conversations(db)
-    return {"conversations": conversations}
+async def get_recent_conversations(
+    before: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Get recently updated conversations with their summaries"""
+    cursor = None
+    if before:
+        # Cursor format: "<updated_at ISO timestamp>|<conversation id>"
+        try:
+            updated_at, conversation_id = before.split("|", 1)
+            cursor = (datetime.fromisoformat(updated_at), conversation_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    conversations = await run_db(crud.get_recent_conversations, limit=limit, before=cursor)
+    last = conversations[-1] if len(conversations) == limit else None
+    return {
+        "conversations": [
+            {
+                "id": conversation.id,
+                "created_at": conversation.created_at,
+                "updated_at": conversation.updated_at,
+                "message_count": conversation.message_count,
+                "deck_count": conversation.deck_count,
+                "last_message_preview": conversation.last_message_preview
+            }
+            for conversation in conversations
+        ],
+        # Pass as ?before= to get the next page
+        "next_before": f"{last.updated_at.isoformat()}|{last.id}" if last else None
+    }
 
 @app.post("/generate-slides")
-async def generate_slides_endpoint(request: dict):
+async def generate_slides_endpoint(request: GenerateSlidesRequest, http_request: Request):
     """Direct endpoint for generating slides from markdown"""
     
-    markdown_content = request.get("markdown", "")
-    theme_name = request.get("theme", "professional")
+    markdown_content = request.markdown
+    theme_name = request.theme
     
     if not markdown_content:
         raise HTTPException(status_code=400, detail="No markdown content provided")
     
-    if theme_name not in slide_themes:
-        theme_name = "professional"
+    theme_name = resolve_theme_name(theme_name)
     
-    slides = parse_markdown_to_slides(markdown_content)
-    theme = slide_themes[theme_name]
-    html_output = generate_html_slides(slides, theme)
+    # Downloads want the self-contained deck; "linked" references cacheable assets
+    mode = resolve_output_mode(request.mode)
+    include_html = request.include_html
+    
+    profile = profiling.profile_for(http_request, "generate_slides")
+    key = deck_cache_key(markdown_content, slide_themes[theme_name], mode) + (":html" if include_html else "")
+    packed = None if profile.active else deck_response_cache.get(key)
+    if packed is not None:
+        # Served as stored: no render, serialization or compression
+        return http_cache.respond(http_request, http_cache.EncodedBody.unpack(packed))
+    
+    deck = await render_deck_async(markdown_content, slide_themes[theme_name], mode, profile=profile)
+    
+    # Stored so /decks/{id} can serve it from any worker
+    deck_id = await publish_deck_page(deck["html"])
+    await run_db(crud.save_deck, deck["html"])
+    
+    content = {
+        "deck_id": deck_id,
+        "deck_url": deck_url(deck_id),
+        "theme_used": theme_name,
+        "slides_count": deck["slides_count"]
+    }
+    if include_html:
+        content["html"] = deck["html"]
+    encoded = http_cache.EncodedBody.from_content(content)
+    deck_response_cache.set(key, await pack_body(encoded))
+    
+    result = http_cache.respond(http_request, encoded)
+    await profile.save()
+    profile.attach_id(result)
+    return result
+
+async def render_batch_document(index: int, document: BatchSlidesDocument) -> dict:
+    """Render one document of a batch, reporting failures on the item itself"""
+    if not document.markdown:
+        return {"index": index, "error": "No markdown content provided"}
+    
+    theme_name = resolve_theme_name(document.theme)
+    try:
+        deck = await render_deck_async(
+            document.markdown,
+            slide_themes[theme_name],
+            resolve_output_mode(document.mode),
+            offload=True
+        )
+    except Exception as e:
+        return {"index": index, "error": f"Rendering failed: {str(e)}"}
     
     return {
-        "html": html_output,
+        "index": index,
+        "html": deck["html"],
         "theme_used": theme_name,
-        "slides_count": len(slides)
+        "slides_count": deck["slides_count"]
     }
 
+@app.post("/generate-slides/batch")
+async def generate_slides_batch_endpoint(request: BatchSlidesRequest):
+    """Render many documents in parallel across render worker processes.
+
+    Returns results in request order, or with `stream` set, one NDJSON line
+    per document as each finishes.
+    """
+    if not request.documents:
+        raise HTTPException(status_code=400, detail="No documents provided")
+    if len(request.documents) > MAX_BATCH_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_DOCUMENTS} documents per batch")
+    
+    tasks = [
+        asyncio.ensure_future(render_batch_document(index, document))
+        for index, document in enumerate(request.documents)
+    ]
+    
+    if not request.stream:
+        return {"results": await asyncio.gather(*tasks)}
+    
+    async def ndjson_results():
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield json.dumps(await next_result) + "\n"
+        finally:
+            # Stop queued renders if the client goes away
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(ndjson_results(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn  # pyright: ignore[reportMissingImports]
     port = int(os.getenv("PORT", 8001))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Data migrations for the slides database.
+
+Usage:
+    python migrate.py decks [--vacuum]
+    python migrate.py compress [--vacuum]
+    python migrate.py summaries
+"""
+
+import argparse
+from database import SessionLocal, compressed_columns, create_tables, engine
+import crud
+
+def migrate_decks(vacuum: bool = False):
+    """Move inline slides_html into the deduplicated decks table"""
+    db = SessionLocal()
+    try:
+        migrated = crud.migrate_slides_html_to_decks(db)
+    finally:
+        db.close()
+    print(f"Moved {migrated} messages to deduplicated decks")
+    
+    if vacuum:
+        vacuum_database()
+
+def compress_columns(vacuum: bool = False):
+    """Rewrite plain-text rows of compressed columns in compressed form"""
+    db = SessionLocal()
+    try:
+        for table, column in compressed_columns:
+            result = crud.backfill_compressed_column(db, table, column)
+            print(
+                f"{table}.{column}: compressed {result['rows']} rows, "
+                f"{result['raw_bytes']} -> {result['stored_bytes']} bytes "
+                f"(ratio {result['ratio']:.2f}x)"
+            )
+    finally:
+        db.close()
+    
+    if vacuum:
+        vacuum_database()
+
+def backfill_summaries():
+    """Compute conversation summaries for rows written before they existed"""
+    db = SessionLocal()
+    try:
+        count = crud.backfill_conversation_summaries(db)
+    finally:
+        db.close()
+    print(f"Recomputed summaries for {count} conversations")
+
+def vacuum_database():
+    """Return freed pages to the filesystem"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("VACUUM")
+    print("Vacuumed database")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run data migrations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    decks_parser = subparsers.add_parser("decks", help="move slides_html into the decks table")
+    decks_parser.add_argument("--vacuum", action="store_true", help="reclaim space afterwards (SQLite)")
+    
+    compress_parser = subparsers.add_parser("compress", help="compress stored message and deck text")
+    compress_parser.add_argument("--vacuum", action="store_true", help="reclaim space afterwards")
+    
+    subparsers.add_parser("summaries", help="recompute conversation summaries from messages")
+    
+    args = parser.parse_args()
+    create_tables()
+    if args.command == "decks":
+        migrate_decks(vacuum=args.vacuum)
+    elif args.command == "compress":
+        compress_columns(vacuum=args.vacuum)
+    elif args.command == "summaries":
+        backfill_summaries()
+
+if __name__ == "__main__":
+    main()
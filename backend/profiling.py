@@ -0,0 +1,121 @@
+import asyncio
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import List, Optional
+
+# Profiling is off unless an admin token is configured
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "slides-profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_PROFILE_ID_PATTERN = re.compile(r"^\d{13}-[a-z_]+-[0-9a-f]{8}$")
+
+def is_authorized(request) -> bool:
+    """Check the request carries the admin profiling token"""
+    if not PROFILE_ADMIN_TOKEN:
+        return False
+    token = request.headers.get(PROFILE_TOKEN_HEADER)
+    return token is not None and hmac.compare_digest(token, PROFILE_ADMIN_TOKEN)
+
+class RequestProfile:
+    """cProfile capture of one request's CPU-bound sections.
+
+    The profiler only runs inside capture() blocks, which must not await:
+    an enabled profiler would record every other request the event loop ran
+    meanwhile, and a second request's profiler would replace its hook.
+    Stats from every block are combined and written to the on-disk ring by
+    save().
+    """
+    active = True
+
+    def __init__(self, label: str):
+        self.label = label
+        self.profile_id: Optional[str] = None
+        self._profiler = cProfile.Profile()
+
+    @contextmanager
+    def capture(self):
+        self._profiler.enable()
+        try:
+            yield self
+        finally:
+            self._profiler.disable()
+
+    async def save(self) -> None:
+        """Write the stats off the event loop"""
+        loop = asyncio.get_running_loop()
+        self.profile_id = await loop.run_in_executor(None, save_profile, self._profiler, self.label)
+
+    def attach_id(self, response) -> None:
+        if self.profile_id:
+            response.headers[PROFILE_ID_HEADER] = self.profile_id
+
+class _NoProfile:
+    """Stand-in for unflagged requests; every method is a no-op"""
+    active = False
+
+    def capture(self):
+        return nullcontext(self)
+
+    async def save(self) -> None:
+        pass
+
+    def attach_id(self, response) -> None:
+        pass
+
+NO_PROFILE = _NoProfile()
+
+def profile_for(request, label: str):
+    """Return a RequestProfile for authorized flagged requests, else NO_PROFILE"""
+    if not is_authorized(request):
+        return NO_PROFILE
+    return RequestProfile(label)
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """Path of a stored profile, or None for unknown or malformed IDs"""
+    if not _PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.pstats")
+    return path if os.path.exists(path) else None
+
+def list_profiles() -> List[str]:
+    """Stored profile IDs, oldest first"""
+    try:
+        names = os.listdir(PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-len(".pstats")] for name in names if name.endswith(".pstats"))
+
+def save_profile(profiler: cProfile.Profile, label: str) -> str:
+    """Write the stats to the ring, dropping the oldest profiles beyond PROFILE_MAX_FILES"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profile_id = f"{int(time.time() * 1000)}-{label}-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.pstats")
+    tmp_path = f"{path}.tmp"
+    profiler.dump_stats(tmp_path)
+    os.replace(tmp_path, path)
+
+    for stale_id in list_profiles()[:-PROFILE_MAX_FILES]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, f"{stale_id}.pstats"))
+        except FileNotFoundError:
+            pass
+    return profile_id
+
+def format_profile(path: str, limit: int = 60) -> str:
+    """Human-readable summary of a stored profile, sorted by cumulative time"""
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+class MemoryStore:
+    """In-process LRU store bounded by the total size of its values"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= len(previous)
+            self._entries[key] = value
+            self.size_bytes += len(value)
+            while self.size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= len(evicted)
+                self.evictions += 1
+
+    async def get_async(self, key: str) -> Optional[bytes]:
+        return self.get(key)
+
+    async def set_async(self, key: str, value: bytes) -> None:
+        self.set(key, value)
+
+class DiskStore:
+    """Directory-backed store that several worker processes can share.
+
+    Files are written atomically and their mtime is bumped on every hit, so
+    eviction removes the least recently used files first. Keys identify their
+    value (RenderCache hashes every render input), so storing an existing key
+    only marks it as used.
+
+    Each process counts its own writes on top of the last directory scan and
+    rescans when that estimate exceeds the budget or is older than
+    `rescan_seconds`, which is how writes by other workers are picked up.
+    The async methods run the file I/O in a worker thread.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, rescan_seconds: float = 60.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rescan_seconds = rescan_seconds
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._rescan_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._approx_bytes = sum(size for _, _, size in self._scan())
+        self._scanned_at = time.monotonic()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _scan(self):
+        """Yield (path, mtime, size) for every cached file"""
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield entry.path, stat.st_mtime, stat.st_size
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.utime(path)
+            return
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._approx_bytes += len(value)
+            due = (
+                self._approx_bytes > self.max_bytes
+                or time.monotonic() - self._scanned_at > self.rescan_seconds
+            )
+        # One rescan at a time per process; concurrent writers skip it
+        if due and self._rescan_lock.acquire(blocking=False):
+            try:
+                self._rescan()
+            finally:
+                self._rescan_lock.release()
+
+    async def get_async(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def set_async(self, key: str, value: bytes) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def _rescan(self) -> None:
+        """Re-measure the directory and, if it is over budget, delete the oldest files down to 90% of it"""
+        entries = list(self._scan())
+        total = sum(size for _, _, size in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * 0.9
+            for path, _, size in sorted(entries, key=lambda entry: entry[1]):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    with self._lock:
+                        self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+        with self._lock:
+            self._approx_bytes = total
+            self._scanned_at = time.monotonic()
+
+class TieredStore:
+    """Memory tier in front of a shared slower tier"""
+
+    def __init__(self, front, back):
+        self.front = front
+        self.back = back
+
+    @property
+    def evictions(self) -> int:
+        return self.front.evictions + self.back.evictions
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.front.get(key)
+        if value is None:
+            value = self.back.get(key)
+            if value is not None:
+                self.front.set(key, value)
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        self.front.set(key, value)
+        self.back.set(key, value)
+
+    async def get_async(self, key: str) -> Optional[bytes]:
+        value = self.front.get(key)
+        if value is None:
+            value = await self.back.get_async(key)
+            if value is not None:
+                self.front.set(key, value)
+        return value
+
+    async def set_async(self, key: str, value: bytes) -> None:
+        self.front.set(key, value)
+        await self.back.set_async(key, value)
+
+class RenderCache:
+    """Content-addressed cache of rendered decks with hit/miss/eviction counters"""
+
+    def __init__(self, store):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Hash the inputs that fully determine a render"""
+        digest = hashlib.sha256()
+        for part in parts:
+            encoded = part.encode("utf-8")
+            # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self.store.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, deck: dict) -> None:
+        self.store.set(key, json.dumps(deck).encode("utf-8"))
+
+    async def get_async(self, key: str) -> Optional[dict]:
+        """get() without blocking the event loop on a disk tier"""
+        value = await self.store.get_async(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    async def set_async(self, key: str, deck: dict) -> None:
+        await self.store.set_async(key, json.dumps(deck).encode("utf-8"))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.store.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+def create_render_cache() -> RenderCache:
+    """Build the render cache configured by RENDER_CACHE_* environment variables"""
+    max_bytes = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    store = MemoryStore(max_bytes)
+    cache_dir = os.getenv("RENDER_CACHE_DIR")
+    if cache_dir:
+        disk_max_bytes = int(os.getenv("RENDER_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+        rescan_seconds = float(os.getenv("RENDER_CACHE_DISK_RESCAN_SECONDS", "60"))
+        store = TieredStore(store, DiskStore(cache_dir, disk_max_bytes, rescan_seconds))
+    return RenderCache(store)
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable
+
+import metrics
+
+coalesced_requests_total = metrics.Counter(
+    "slides_coalesced_requests_total", "Requests that awaited an identical in-flight computation", ("operation",)
+)
+
+class SingleFlight:
+    """Share one in-flight computation between concurrent callers with the same key.
+
+    The computation runs as its own task, so a caller that is cancelled (for
+    example because its client disconnected) does not cancel it for the
+    others; it is cancelled only once every caller has gone away.
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.leaders = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable]):
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.coalesced += 1
+            coalesced_requests_total.inc(operation=self.operation)
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0 and not task.done():
+                    # Later callers start afresh instead of joining a cancelled task
+                    del self._inflight[key]
+                    del self._waiters[key]
+                    task.cancel()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller left early
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._inflight), "leaders": self.leaders, "coalesced": self.coalesced}
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the markdown -> slides pipeline.
+
+Times parse_markdown_to_slides, generate_html_slides and the /generate-slides
+endpoint (through an in-process test client) on synthetic decks of 10 to
+10,000 slides with code blocks, tables and lists. Renders are measured cold:
+the deck, slide, response and deck page caches are emptied before every run.
+The endpoint timing leaves out storing the deck; crud.save_deck is timed
+separately as "persist", inserting the deck into an emptied decks table.
+
+Usage:
+    python bench_pipeline.py                          # print timings
+    python bench_pipeline.py --save baseline.json     # record a baseline
+    python bench_pipeline.py --baseline baseline.json # fail on regressions
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import crud  # noqa: E402
+import main  # noqa: E402
+import render_cache  # noqa: E402
+from database import Deck, SessionLocal  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402  # pyright: ignore[reportMissingImports]
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+def make_corpus(slide_count, seed=0):
+    """Build a synthetic deck mixing paragraphs, lists, tables and code blocks"""
+    rng = random.Random(seed)
+    parts = ["# Benchmark Deck\n\nGenerated content for timing the slide pipeline.\n"]
+    for i in range(slide_count):
+        parts.append(f"\n## Slide {i}: Topic {rng.randint(0, 9999)}\n\n")
+        parts.append(f"Some **bold** claims, *emphasis* and `inline code` about item {i}.\n\n")
+        kind = i % 4
+        if kind == 0:
+            for j in range(rng.randint(3, 8)):
+                parts.append(f"- Point {j} with [a link](https://example.com/{i}/{j})\n")
+        elif kind == 1:
+            parts.append("| Metric | Q1 | Q2 |\n|---|---|---|\n")
+            for j in range(rng.randint(2, 6)):
+                parts.append(f"| Row {j} | {rng.randint(0, 99)} | {rng.randint(0, 99)} |\n")
+        elif kind == 2:
+            parts.append("```python\n# not a slide header\n")
+            for j in range(rng.randint(3, 10)):
+                parts.append(f"value_{j} = compute({j}, {rng.random():.3f})\n")
+            parts.append("```\n")
+        else:
+            for j in range(rng.randint(2, 5)):
+                parts.append(f"{j + 1}. Step {j} of the process\n")
+            parts.append("\n### Details\n\n> A quoted remark about the results.\n")
+    return "".join(parts)
+
+def reset_caches():
+    """Start each run cold so cached renders do not hide regressions"""
+    main.deck_cache = render_cache.RenderCache(render_cache.MemoryStore(64 * 1024 * 1024))
+    main.slide_fragment_cache = render_cache.MemoryStore(main.slide_fragment_cache.max_bytes)
+    main.deck_response_cache = render_cache.MemoryStore(main.deck_response_cache.max_bytes)
+    main.deck_page_cache = render_cache.MemoryStore(main.deck_page_cache.max_bytes)
+
+def skip_deck_storage(db, html):
+    """Stands in for crud.save_deck so endpoint timings cover rendering only"""
+    return None
+
+def save_deck_fresh(html):
+    """Time crud.save_deck as a real insert rather than a lookup of an existing deck"""
+    db = SessionLocal()
+    try:
+        db.query(Deck).delete()
+        db.commit()
+        start = time.perf_counter()
+        crud.save_deck(db, html)
+        return time.perf_counter() - start
+    finally:
+        db.close()
+
+def best_of(repeats, func):
+    """Return the fastest of several timed runs, in seconds"""
+    timings = []
+    for _ in range(repeats):
+        reset_caches()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run_benchmarks(sizes, repeats):
+    # Render inline so the endpoint timing measures this process only
+    main.RENDER_PROCESSES = 0
+    client = TestClient(main.app)
+    theme = main.slide_themes["professional"]
+    results = {}
+
+    for size in sizes:
+        corpus = make_corpus(size)
+        slides = main.parse_markdown_to_slides(corpus)
+        runs = repeats if size < 10000 else max(1, repeats // 2)
+
+        results[f"parse/{size}"] = best_of(runs, lambda: main.parse_markdown_to_slides(corpus))
+        results[f"render/{size}"] = best_of(runs, lambda: main.generate_html_slides(slides, theme))
+
+        def call_endpoint():
+            response = client.post("/generate-slides", json={"markdown": corpus, "theme": "professional"})
+            assert response.status_code == 200, response.text
+
+        save_deck = crud.save_deck
+        crud.save_deck = skip_deck_storage
+        try:
+            results[f"endpoint/{size}"] = best_of(runs, call_endpoint)
+        finally:
+            crud.save_deck = save_deck
+
+        html = main.generate_html_slides(slides, theme)
+        results[f"persist/{size}"] = min(save_deck_fresh(html) for _ in range(runs))
+
+        print(
+            f"📏 {size:>6} slides ({len(corpus) / 1024:8.1f} KB): "
+            f"parse {results[f'parse/{size}'] * 1000:9.2f} ms | "
+            f"render {results[f'render/{size}'] * 1000:9.2f} ms | "
+            f"endpoint {results[f'endpoint/{size}'] * 1000:9.2f} ms | "
+            f"persist {results[f'persist/{size}'] * 1000:9.2f} ms"
+        )
+    return results
+
+def compare(results, baseline, threshold):
+    """Print the change against a baseline and return the regressed benchmarks"""
+    regressions = []
+    for name, seconds in results.items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            continue
+        ratio = seconds / previous
+        marker = "❌" if ratio > 1 + threshold else "✅"
+        print(f"{marker} {name:<16} {previous * 1000:9.2f} ms -> {seconds * 1000:9.2f} ms ({ratio:5.2f}x)")
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown -> slides pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="slide counts to benchmark")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per benchmark; the fastest is kept")
+    parser.add_argument("--save", help="write results to this JSON baseline file")
+    parser.add_argument("--baseline", help="compare against this JSON baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    print("⏱️  Benchmarking slide pipeline\n")
+    results = run_benchmarks(args.sizes, args.repeats)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.now().isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "renderer_version": main.RENDERER_VERSION
+                },
+                "results": results
+            }, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n📊 Comparing against {args.baseline} (threshold {args.threshold:.0%})")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n🎉 No regressions")
+
+if __name__ == "__main__":
+    main_cli()
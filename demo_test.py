@@ -66,8 +66,10 @@ This agent showcases technical skill, business thinking, and the ability to ship
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"demo_slides_{timestamp}.html"
             
+            deck = requests.get(f"http://localhost:8001{result['deck_url']}")
+            deck.raise_for_status()
             with open(filename, 'w', encoding='utf-8') as f:
-                f.write(result['html'])
+                f.write(deck.text)
             
             print(f"✅ Slides saved to: {filename}")
             print(f"✅ Open {filename} in your browser to see the slides!")
@@ -3,7 +3,7 @@
 import { useState, useRef, useEffect } from 'react';
 import { Send, FileText, Sparkles, Download, Palette } from 'lucide-react';
 import toast from 'react-hot-toast';
-import { chatAPI } from '@/lib/api';
+import { chatAPI, deckUrl } from '@/lib/api';
 import { ChatMessage, SlideTheme } from '@/types';
 import ChatInterface from '@/components/ChatInterface';
 import SlidePreview from '@/components/SlidePreview';
@@ -14,7 +14,7 @@ export default function Home() {
   const [inputMessage, setInputMessage] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [conversationId, setConversationId] = useState<string | null>(null);
-  const [currentSlides, setCurrentSlides] = useState<string | null>(null);
+  const [currentDeckUrl, setCurrentDeckUrl] = useState<string | null>(null);
   const [themes, setThemes] = useState<Record<string, SlideTheme>>({});
   const [selectedTheme, setSelectedTheme] = useState('professional');
   const [showPreview, setShowPreview] = useState(false);
@@ -104,15 +104,15 @@ export default function Home() {
         role: 'assistant',
         content: response.message,
         timestamp: new Date(),
-        slides_html: response.slides_html,
+        deck_url: response.deck_url,
         theme_suggestion: response.theme_suggestion,
       };
 
       setMessages((prev) => [...prev, assistantMessage]);
       setConversationId(response.conversation_id);
 
-      if (response.slides_html) {
-        setCurrentSlides(response.slides_html);
+      if (response.deck_url) {
+        setCurrentDeckUrl(deckUrl(response.deck_url));
         setShowPreview(true);
         toast.success('Slides generated successfully! 🎉');
       }
@@ -136,7 +136,7 @@ export default function Home() {
   };
 
   const regenerateWithTheme = async (themeKey: string) => {
-    if (!currentSlides) return;
+    if (!currentDeckUrl) return;
 
     const lastUserMessage = messages.filter((m) => m.role === 'user').pop();
     if (!lastUserMessage) return;
@@ -144,7 +144,7 @@ export default function Home() {
     setIsLoading(true);
     try {
       const response = await chatAPI.generateSlides(lastUserMessage.content, themeKey);
-      setCurrentSlides(response.html);
+      setCurrentDeckUrl(deckUrl(response.deck_url));
       setSelectedTheme(themeKey);
       toast.success(`Slides regenerated with ${themes[themeKey]?.name} theme!`);
     } catch (error) {
@@ -156,17 +156,15 @@ export default function Home() {
   };
 
   const downloadSlides = () => {
-    if (!currentSlides || typeof window === 'undefined') return;
+    if (!currentDeckUrl || typeof window === 'undefined') return;
 
-    const blob = new Blob([currentSlides], { type: 'text/html' });
-    const url = URL.createObjectURL(blob);
+    // The server sends the deck as an attachment, so the browser saves it directly
     const a = document.createElement('a');
-    a.href = url;
+    a.href = `${currentDeckUrl}?download=true`;
     a.download = 'slides.html';
     document.body.appendChild(a);
     a.click();
     document.body.removeChild(a);
-    URL.revokeObjectURL(url);
     toast.success('Slides downloaded!');
   };
 
@@ -253,7 +251,7 @@ export default function Home() {
                 <Palette className="text-green-400" size={18} />
                 Preview & Export
               </h2>
-              {currentSlides && (
+              {currentDeckUrl && (
                 <button
                   onClick={downloadSlides}
                   className="bg-green-600 hover:bg-green-700 text-white px-2 py-1 rounded-lg transition-colors flex items-center gap-1 text-xs"
@@ -264,7 +262,7 @@ export default function Home() {
               )}
             </div>
 
-            {currentSlides ? (
+            {currentDeckUrl ? (
               <div className="p-3 flex-1 min-h-0 overflow-y-auto">
                 <ThemeSelector
                   themes={themes}
@@ -274,7 +272,7 @@ export default function Home() {
                 />
 
                 <SlidePreview
-                  slidesHtml={currentSlides}
+                  deckUrl={currentDeckUrl}
                   showPreview={showPreview}
                   onTogglePreview={() => setShowPreview(!showPreview)}
                 />
@@ -47,7 +47,7 @@ export default function ChatInterface({
             >
               <p className="whitespace-pre-wrap text-sm">{message.content}</p>
 
-              {message.slides_html && (
+              {message.deck_url && (
                 <div className="mt-1 pt-1 border-t border-gray-600">
                   <div className="flex items-center gap-1 text-xs text-green-600">
                     <FileText size={12} />
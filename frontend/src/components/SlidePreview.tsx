@@ -4,13 +4,13 @@ import { useState } from 'react';
 import { Eye, EyeOff, ExternalLink } from 'lucide-react';
 
 interface SlidePreviewProps {
-  slidesHtml: string;
+  deckUrl: string;
   showPreview: boolean;
   onTogglePreview: () => void;
 }
 
 export default function SlidePreview({
-  slidesHtml,
+  deckUrl,
   showPreview,
   onTogglePreview,
 }: SlidePreviewProps) {
@@ -19,12 +19,7 @@ export default function SlidePreview({
   const openInNewTab = () => {
     if (typeof window === 'undefined') return;
     
-    const blob = new Blob([slidesHtml], { type: 'text/html' });
-    const url = URL.createObjectURL(blob);
-    window.open(url, '_blank');
-
-    // Clean up the URL after a delay
-    setTimeout(() => URL.revokeObjectURL(url), 1000);
+    window.open(deckUrl, '_blank', 'noopener');
   };
 
   return (
@@ -50,7 +45,8 @@ export default function SlidePreview({
       {showPreview && (
         <div className="border border-gray-600 rounded-lg overflow-hidden">
           <iframe
-            srcDoc={slidesHtml}
+            src={deckUrl}
+            sandbox="allow-scripts allow-popups"
             className="w-full h-96 border-0"
             title="Slide Preview"
           />
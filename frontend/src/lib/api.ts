@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { ChatRequest, ChatResponse, SlideTheme } from '@/types';
+import { ChatRequest, ChatResponse, GenerateSlidesResponse, SlideTheme } from '@/types';
 
 // Use relative URLs for production (same domain), localhost for development
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || '';
@@ -28,7 +28,10 @@ export const chatAPI = {
     return response.data;
   },
 
-  generateSlides: async (markdown: string, theme: string = 'professional') => {
+  generateSlides: async (
+    markdown: string,
+    theme: string = 'professional'
+  ): Promise<GenerateSlidesResponse> => {
     const response = await api.post('/generate-slides', {
       markdown,
       theme,
@@ -47,4 +50,8 @@ export const chatAPI = {
   },
 };
 
+// Deck URLs from the API are relative to the backend; load them directly
+// (iframe src, links) so the browser streams the HTML instead of decoding JSON
+export const deckUrl = (path: string): string => `${API_BASE_URL}${path}`;
+
 export default api;
@@ -3,7 +3,7 @@ export interface ChatMessage {
   role: 'user' | 'assistant';
   content: string;
   timestamp: Date;
-  slides_html?: string;
+  deck_url?: string;
   theme_suggestion?: string;
 }
 
@@ -23,7 +23,15 @@ export interface ChatRequest {
 
 export interface ChatResponse {
   message: string;
-  slides_html?: string;
+  deck_id?: string;
+  deck_url?: string;
   theme_suggestion?: string;
   conversation_id: string;
 }
+
+export interface GenerateSlidesResponse {
+  deck_id: string;
+  deck_url: string;
+  theme_used: string;
+  slides_count: number;
+}
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the rule-based message classifier in backend/classifier.py.
+Runs without a server: `python test_classifier.py` or `pytest test_classifier.py`.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from classifier import MessageClassifier, classifier  # noqa: E402
+
+def legacy_analyze(user_message):
+    """The checks analyze_message and get_rule_based_response made before the classifier"""
+    has_headers = any(indicator in user_message for indicator in ['#', '##', '###'])
+    has_sufficient_content = len(user_message.strip()) > 50
+    has_markdown = has_headers and has_sufficient_content
+
+    theme_name = "professional"
+    if any(word in user_message.lower() for word in ['creative', 'fun', 'colorful', 'vibrant', 'modern']):
+        theme_name = "creative"
+    elif any(word in user_message.lower() for word in ['minimal', 'simple', 'clean', 'basic']):
+        theme_name = "minimal"
+
+    slide_count = 0
+    intent = None
+    if has_markdown:
+        slide_count = user_message.count('#')
+    elif any(word in user_message.lower() for word in ['help', 'how', 'what', 'hello', 'hi']):
+        intent = "help"
+    else:
+        intent = "chat"
+    return {
+        "has_headers": has_headers,
+        "has_markdown": has_markdown,
+        "slide_estimate": slide_count,
+        "suggested_theme": theme_name,
+        "intent": intent
+    }
+
+def make_corpus(count, seed=0):
+    """Random messages built from headings, keywords and filler, with and without separators"""
+    atoms = ["#", "##", "###", "# ", "## ", "\n", "\n", " ", "\t", "text", "Title", "- item", "\r\n",
+             "Slide", "x" * 60, "WHAT", "Hi", "Fun", "CLEAN", "which", "show", "this", "basicreative", "İ"]
+    atoms += ['creative', 'fun', 'colorful', 'vibrant', 'modern', 'minimal', 'simple', 'clean', 'basic']
+    atoms += ['help', 'how', 'what', 'hello', 'hi']
+    rng = random.Random(seed)
+    corpus = ["", "   ", "hello", "# Title", "help me with # headers please", "What is this?"]
+    for i in range(count):
+        separator = " " if i % 2 else ""
+        corpus.append(separator.join(rng.choice(atoms) for _ in range(rng.randint(0, 25))))
+    return corpus
+
+def make_document(slide_count, seed=0):
+    """A large markdown paste without any keywords, so every keyword is searched in full"""
+    rng = random.Random(seed)
+    parts = ["# Quarterly Review\n"]
+    for i in range(slide_count):
+        parts.append(f"\n## Section {i}\nIntro paragraph for section {i} with **bold** text, number {rng.randint(0, 999)}.\n")
+    return "".join(parts)
+
+def test_matches_legacy_checks():
+    """Every field agrees with the old substring checks"""
+    for message in make_corpus(5000):
+        assert classifier.classify(message) == legacy_analyze(message), repr(message)
+
+def test_theme_priority():
+    assert classifier.classify("# Plan\nnothing special")["suggested_theme"] == "professional"
+    # Creative keywords win over minimal ones however many of each there are
+    assert classifier.classify("simple, clean and minimal, but fun")["suggested_theme"] == "creative"
+    assert classifier.classify("basicreative")["suggested_theme"] == "creative"
+    assert classifier.classify("SIMPLE")["suggested_theme"] == "minimal"
+
+def test_slide_estimate_counts_every_hash():
+    body = "Some body text long enough to count as slide content.\n"
+    assert classifier.classify("# One\n" + body + "## Two\n" + body)["slide_estimate"] == 3
+    assert classifier.classify("# Hi")["slide_estimate"] == 0
+
+def test_custom_keywords():
+    custom = MessageClassifier({
+        "themes": {"dark": ["Night"], "creative": ["fun"]},
+        "intents": {"greeting": ["hey"], "help": ["help"]},
+    })
+    analysis = custom.classify("Help me make a fun night-themed deck, hey")
+    # Table order decides between matching categories
+    assert analysis["suggested_theme"] == "dark"
+    assert analysis["intent"] == "greeting"
+    assert custom.classify("fun")["suggested_theme"] == "creative"
+    assert custom.classify("nothing to see")["intent"] == "chat"
+
+def test_faster_than_legacy_on_large_paste():
+    """Lowercasing once beats the old per-keyword lower() calls on a multi-megabyte paste"""
+    document = make_document(40000)
+    assert len(document) > 3 * 1024 * 1024
+
+    timings = []
+    for analyze in (legacy_analyze, classifier.classify):
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            analyze(document)
+            best = min(best, time.perf_counter() - start)
+        timings.append(best)
+
+    print(f"   legacy {timings[0] * 1000:.1f} ms, classifier {timings[1] * 1000:.1f} ms")
+    assert timings[1] < timings[0]
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing message classifier\n")
+    tests = [
+        test_matches_legacy_checks,
+        test_theme_priority,
+        test_slide_estimate_counts_every_hash,
+        test_custom_keywords,
+        test_faster_than_legacy_on_large_paste,
+    ]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_func.__name__}: {e}")
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
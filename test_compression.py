@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for compressed text columns (CompressedText in backend/database.py) and
+the `migrate.py compress` backfill.
+Runs without a server: `python test_compression.py` or `pytest test_compression.py`.
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import zlib
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import text  # noqa: E402
+import crud  # noqa: E402
+from database import CompressedText, Message, SessionLocal, create_tables  # noqa: E402
+
+DECK_HTML = "<section class='slide'><h1>Quarterly Review</h1><p>Revenue grew again.</p></section>\n" * 50
+
+def test_round_trip():
+    """Compressible text is zlib-marked, short text stays raw, and both read back unchanged"""
+    for value, marker in ((DECK_HTML, CompressedText.ZLIB), ("hi", CompressedText.RAW), ("", CompressedText.RAW)):
+        stored = CompressedText.compress(value)
+        assert stored[:1] == marker, repr(value)
+        assert CompressedText.is_compressed(stored)
+        assert CompressedText.decompress(stored) == value
+    assert len(CompressedText.compress(DECK_HTML)) < len(DECK_HTML) / 10
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        deck_id = crud.save_deck(db, DECK_HTML)
+        stored = db.execute(text("SELECT html FROM decks WHERE id = :id"), {"id": deck_id}).scalar()
+        assert bytes(stored[:1]) == CompressedText.ZLIB
+        assert crud.get_deck_html(db, deck_id) == DECK_HTML
+    finally:
+        db.close()
+
+def test_legacy_plain_text_row():
+    """Rows written as plain text before compression are read back as they are"""
+    create_tables()
+    db = SessionLocal()
+    try:
+        message_id = db.execute(
+            text("INSERT INTO messages (conversation_id, role, content) VALUES ('legacy', 'user', :content) RETURNING id"),
+            {"content": "# Old message\nwritten before compression"}
+        ).scalar()
+        db.commit()
+        stored = db.execute(text("SELECT content FROM messages WHERE id = :id"), {"id": message_id}).scalar()
+        assert not CompressedText.is_compressed(stored)
+        message = db.get(Message, message_id)
+        assert message.content == "# Old message\nwritten before compression"
+    finally:
+        db.close()
+
+def run_migration(database_url, *args):
+    return subprocess.run(
+        [sys.executable, "migrate.py", *args],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": database_url},
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+
+def test_migrate_compress():
+    """`migrate.py compress` rewrites plain-text rows compressed and leaves compressed ones alone"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "slides.db")
+        database_url = f"sqlite:///{path}"
+        # Any command creates the tables
+        run_migration(database_url, "summaries")
+
+        connection = sqlite3.connect(path)
+        connection.execute(
+            "INSERT INTO messages (id, conversation_id, role, content) VALUES (1, 'legacy', 'assistant', ?)",
+            (DECK_HTML,)
+        )
+        connection.execute(
+            "INSERT INTO messages (id, conversation_id, role, content) VALUES (2, 'legacy', 'user', ?)",
+            (CompressedText.compress("already compressed " * 20),)
+        )
+        connection.commit()
+
+        output = run_migration(database_url, "compress", "--vacuum")
+        assert "messages.content: compressed 1 rows" in output, output
+
+        rows = dict(connection.execute("SELECT id, content FROM messages").fetchall())
+        connection.close()
+        assert rows[1][:1] == CompressedText.ZLIB
+        assert zlib.decompress(rows[1][1:]).decode("utf-8") == DECK_HTML
+        assert CompressedText.decompress(rows[2]) == "already compressed " * 20
+
+        # A second run finds nothing left to compress
+        assert "messages.content: compressed 0 rows" in run_migration(database_url, "compress")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing compressed text columns\n")
+    tests = [
+        test_round_trip,
+        test_legacy_plain_text_row,
+        test_migrate_compress,
+    ]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_func.__name__}: {e}")
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
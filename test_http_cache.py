@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for ETags, gzip and packed cache entries in backend/http_cache.py.
+Runs without a server: `python test_http_cache.py` or `pytest test_http_cache.py`.
+"""
+
+import gzip
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import http_cache  # noqa: E402
+
+class FakeRequest:
+    def __init__(self, method="GET", headers=None):
+        self.method = method
+        self.headers = {name.lower(): value for name, value in (headers or {}).items()}
+
+def served(encoded, **request_args):
+    response = http_cache.respond(FakeRequest(**request_args), encoded)
+    return response.status_code, response.headers.get("etag"), response.headers.get("content-encoding"), response.body
+
+def test_cache_hits_match_fresh_responses():
+    """A body restored from its packed entry is served exactly like the fresh one"""
+    small = http_cache.EncodedBody.from_content({"deck_id": "x" * 64, "slides_count": 1})
+    large = http_cache.EncodedBody(b"<div>slide</div>\n" * 200)
+    assert not small.worth_compressing and large.worth_compressing
+
+    for fresh in (small, large):
+        restored = http_cache.EncodedBody.unpack(fresh.pack())
+        assert restored.length == fresh.length
+        for headers in ({"Accept-Encoding": "gzip"}, {}):
+            assert served(restored, headers=headers) == served(fresh, headers=headers)
+
+def test_gzip_only_above_threshold():
+    large = http_cache.EncodedBody(b"a" * http_cache.GZIP_MIN_BYTES)
+    status, etag, encoding, body = served(large, headers={"Accept-Encoding": "gzip, br"})
+    assert (status, encoding) == (200, "gzip")
+    assert etag.endswith('-gzip"')
+    assert gzip.decompress(body) == large.body
+    # q=0 refuses gzip
+    assert served(large, headers={"Accept-Encoding": "gzip;q=0"})[2] is None
+
+def test_not_modified():
+    encoded = http_cache.EncodedBody(b"deck")
+    etag = encoded.etag()
+    assert served(encoded, headers={"If-None-Match": etag})[0] == 304
+    assert served(encoded, method="HEAD", headers={"If-None-Match": f'"other", W/{etag}'})[0] == 304
+    assert served(encoded, headers={"If-None-Match": '"other"'})[0] == 200
+
+def test_post_has_no_validators():
+    """POST responses are compressed but never 304, and carry no ETag"""
+    encoded = http_cache.EncodedBody(b"x" * http_cache.GZIP_MIN_BYTES)
+    status, etag, encoding, _ = served(encoded, method="POST", headers={"If-None-Match": "*", "Accept-Encoding": "gzip"})
+    assert (status, etag, encoding) == (200, None, "gzip")
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing HTTP caching helpers\n")
+    tests = [
+        test_cache_hits_match_fresh_responses,
+        test_gzip_only_above_threshold,
+        test_not_modified,
+        test_post_has_no_validators,
+    ]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_func.__name__}: {e}")
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
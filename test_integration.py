@@ -60,13 +60,15 @@ This is working perfectly!"""
         result = response.json()
         print(f"✅ Chat Response: {result['message'][:100]}...")
         
-        if result.get('slides_html'):
+        if result.get('deck_url'):
             print("✅ Slides Generated Successfully!")
             print(f"✅ Theme Suggestion: {result.get('theme_suggestion', 'None')}")
             
             # Save generated slides for inspection
+            deck = requests.get(f"{BACKEND_URL}{result['deck_url']}")
+            deck.raise_for_status()
             with open('test_slides.html', 'w', encoding='utf-8') as f:
-                f.write(result['slides_html'])
+                f.write(deck.text)
             print("✅ Test slides saved to 'test_slides.html'")
             
         return True
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass slide tokenizer in backend/main.py.
+Runs without a server: `python test_parser.py` or `pytest test_parser.py`.
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from main import parse_markdown_to_slides, iter_markdown_slides  # noqa: E402
+
+def legacy_parse(markdown_content):
+    """The original re.split based parser, kept as the reference output"""
+    slides = []
+    sections = re.split(r'^(#{1,2}\s+.+)$', markdown_content, flags=re.MULTILINE)
+    current_slide = {"title": "", "content": ""}
+    for section in sections:
+        section = section.strip()
+        if not section:
+            continue
+        if re.match(r'^#{1,2}\s+', section):
+            if current_slide["title"] or current_slide["content"]:
+                slides.append(current_slide.copy())
+            current_slide = {"title": re.sub(r'^#{1,2}\s+', '', section), "content": ""}
+        else:
+            current_slide["content"] += section + "\n"
+    if current_slide["title"] or current_slide["content"]:
+        slides.append(current_slide)
+    if not slides:
+        slides.append({"title": "Presentation", "content": markdown_content})
+    return slides
+
+def without_fingerprints(slides):
+    return [{"title": slide["title"], "content": slide["content"]} for slide in slides]
+
+def make_document(slide_count, seed=0):
+    """Build a realistic markdown deck with lists, tables and emphasis"""
+    rng = random.Random(seed)
+    parts = ["# Quarterly Review\n"]
+    for i in range(slide_count):
+        parts.append(f"\n## Section {i}\n")
+        parts.append(f"Intro paragraph for section {i} with **bold** and *italic* text.\n\n")
+        for j in range(rng.randint(1, 5)):
+            parts.append(f"- Point {j} about topic {rng.randint(0, 999)}\n")
+        if i % 3 == 0:
+            parts.append("\n### Details\n| Metric | Value |\n|---|---|\n| Revenue | 42 |\n")
+    return "".join(parts)
+
+def test_matches_legacy_parser():
+    """Output is identical to the original parser on documents without code fences"""
+    atoms = ["#", "##", "###", " ", "\t", "\n", "\n", "x", "Title", "- item", "\r", "  # x", "#\n", "\xa0"]
+    rng = random.Random(42)
+    documents = [make_document(20), "", "   \n", "no headers at all", "#\n\nTitle\ntext", "text\n\n\n#  "]
+    documents += ["".join(rng.choice(atoms) for _ in range(rng.randint(0, 30))) for _ in range(5000)]
+    for document in documents:
+        assert without_fingerprints(parse_markdown_to_slides(document)) == legacy_parse(document), repr(document)
+
+def test_skips_headers_in_code_fences():
+    document = "# Setup\n```bash\n# install deps\npip install x\n```\n## Next\n~~~\n## not a slide\n~~~\ndone"
+    slides = parse_markdown_to_slides(document)
+    assert [slide["title"] for slide in slides] == ["Setup", "Next"]
+    assert "# install deps" in slides[0]["content"]
+    assert "## not a slide" in slides[1]["content"]
+
+def test_generator_yields_slides_as_they_complete():
+    slides = iter_markdown_slides("# One\nfirst\n## Two\nsecond\n## Three")
+    assert next(slides)["title"] == "One"
+    assert [slide["title"] for slide in slides] == ["Two", "Three"]
+
+def test_throughput_on_multi_megabyte_input():
+    """Parsing stays linear: a 4x larger document takes roughly 4x as long"""
+    small = make_document(8000)
+    large = make_document(32000)
+    assert len(large) > 4 * 1024 * 1024
+
+    timings = []
+    for document in (small, large):
+        start = time.perf_counter()
+        slides = parse_markdown_to_slides(document)
+        timings.append(time.perf_counter() - start)
+        assert len(slides) == document.count("\n## ") + 1
+
+    megabytes_per_second = len(large) / (1024 * 1024) / timings[1]
+    print(f"   {len(large) / (1024 * 1024):.1f} MB parsed at {megabytes_per_second:.1f} MB/s")
+    assert megabytes_per_second > 1.0
+    assert timings[1] < timings[0] * 8
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing slide tokenizer\n")
+    tests = [
+        test_matches_legacy_parser,
+        test_skips_headers_in_code_fences,
+        test_generator_yields_slides_as_they_complete,
+        test_throughput_on_multi_megabyte_input,
+    ]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_func.__name__}: {e}")
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()
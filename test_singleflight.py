@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for request coalescing in backend/singleflight.py.
+Runs without a server: `python test_singleflight.py` or `pytest test_singleflight.py`.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from singleflight import SingleFlight  # noqa: E402
+
+class GatedWork:
+    """A computation that blocks until released and records how it ran"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = 0
+        self.cancelled = 0
+
+    async def run(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"result {self.started}"
+
+async def settle():
+    """Let every ready task run up to its next await"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_identical_calls_run_once():
+    async def scenario():
+        flight = SingleFlight("test")
+        work = GatedWork()
+        callers = [asyncio.ensure_future(flight.do("key", work.run)) for _ in range(5)]
+        await settle()
+        work.release.set()
+        results = await asyncio.gather(*callers)
+
+        assert results == ["result 1"] * 5
+        assert work.started == 1
+        assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+        # Different keys do not share work
+        other = GatedWork()
+        other.release.set()
+        assert await asyncio.gather(flight.do("a", other.run), flight.do("b", other.run)) == ["result 1", "result 2"]
+
+    asyncio.run(scenario())
+
+def test_cancelled_follower_leaves_others_running():
+    async def scenario():
+        flight = SingleFlight("test")
+        work = GatedWork()
+        leader = asyncio.ensure_future(flight.do("key", work.run))
+        follower = asyncio.ensure_future(flight.do("key", work.run))
+        other = asyncio.ensure_future(flight.do("key", work.run))
+        await settle()
+
+        follower.cancel()
+        await settle()
+        assert follower.cancelled()
+        assert work.cancelled == 0
+        assert flight.stats()["in_flight"] == 1
+
+        # The leader is just another waiter: losing it does not cancel the work either
+        leader.cancel()
+        await settle()
+        assert work.cancelled == 0
+
+        work.release.set()
+        assert await other == "result 1"
+        assert work.started == 1
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+def test_work_cancelled_when_every_caller_leaves():
+    async def scenario():
+        flight = SingleFlight("test")
+        work = GatedWork()
+        callers = [asyncio.ensure_future(flight.do("key", work.run)) for _ in range(3)]
+        await settle()
+
+        for caller in callers[:-1]:
+            caller.cancel()
+        await settle()
+        assert work.cancelled == 0
+
+        callers[-1].cancel()
+        await settle()
+        assert work.cancelled == 1
+        assert flight.stats()["in_flight"] == 0
+
+        # A later caller starts afresh instead of joining the cancelled task
+        work.release.set()
+        assert await flight.do("key", work.run) == "result 2"
+        assert flight.stats()["leaders"] == 2
+
+    asyncio.run(scenario())
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing request coalescing\n")
+    tests = [
+        test_identical_calls_run_once,
+        test_cancelled_follower_leaves_others_running,
+        test_work_cancelled_when_every_caller_leaves,
+    ]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            print(f"✅ {test_func.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_func.__name__}: {e}")
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+
+if __name__ == "__main__":
+    main()